@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import music_generation
+from chord_management import CHORD_FREQUENCIES, CHORD_TYPES
+from render_cache import drum_hit_cache, impulse_cache, noise_cache, section_cache, wavetable_cache
+from synthesis import SAMPLE_RATE, samples_for
+
+QUICK_GRID = {
+    "durations_s": [1, 10],
+    "chord_types": ["Major", "Dominant 7th", "13th"],
+    "bpms": [120],
+    "sections": [4],
+}
+
+FULL_GRID = {
+    "durations_s": [1, 10, 60, 600],
+    "chord_types": ["Major", "Dominant 7th", "9th", "11th", "13th"],
+    "bpms": [90, 120, 180],
+    "sections": [4, 16, 64],
+}
+
+# A case is slower than its baseline when its wall time grows by more than this fraction
+DEFAULT_TOLERANCE = 0.25
+
+def reset_caches():
+    # Every case measures a cold render, so results don't depend on case order
+    drum_hit_cache.clear()
+    noise_cache.clear()
+    impulse_cache.clear()
+    section_cache.clear()
+    wavetable_cache.clear()
+    music_generation.last_render["stems"] = {}
+    random.seed(0)
+
+def make_progression(section_count, duration_s, bpm):
+    names = list(CHORD_FREQUENCIES)
+    types = list(CHORD_TYPES)
+    return [(names[i % len(names)], types[i % len(types)], i % 3 == 0, True, True, duration_s, bpm, "4/4", -10, 0.5, 300, 0.5, 4)
+            for i in range(section_count)]
+
+def build_cases(grid):
+    cases = []
+    base_freq = CHORD_FREQUENCIES["C"]
+
+    for duration_s in grid["durations_s"]:
+        duration_ms = duration_s * 1000
+        samples = samples_for(duration_ms)
+        cases.append((f"sine_wave/{duration_s}s", samples, lambda d=duration_ms: music_generation.generate_sine_wave(440, d)))
+        for chord_type in grid["chord_types"]:
+            intervals = CHORD_TYPES[chord_type]
+            cases.append((f"chord/{chord_type}/{duration_s}s", samples,
+                          lambda i=intervals, d=duration_ms: music_generation.generate_chord(base_freq, i, d)))
+            cases.append((f"arpeggio/{chord_type}/{duration_s}s", samples,
+                          lambda i=intervals, d=duration_ms: music_generation.generate_arpeggio(base_freq, i, d)))
+        for bpm in grid["bpms"]:
+            cases.append((f"drum_beat/{bpm}bpm/{duration_s}s", samples,
+                          lambda d=duration_ms, b=bpm: music_generation.generate_drum_beat(d, b, "4/4")))
+        cases.append((f"atmospheric_noise/{duration_s}s", samples, lambda d=duration_ms: music_generation.generate_atmospheric_noise(d)))
+
+        segment = music_generation.generate_chord(base_freq, CHORD_TYPES["Major"], duration_ms)
+        cases.append((f"reverb/{duration_s}s", samples, lambda s=segment: music_generation.apply_reverb(s)))
+        cases.append((f"echo/{duration_s}s", samples, lambda s=segment: music_generation.apply_echo(s)))
+
+    for section_count in grid["sections"]:
+        for bpm in grid["bpms"]:
+            duration_s = grid["durations_s"][0]
+            settings = {"chords": make_progression(section_count, duration_s, bpm), "loops": 1, "include_chords": True, "include_noise": True}
+            samples = samples_for(section_count * duration_s * 1000)
+            cases.append((f"generate_music/{section_count}x{duration_s}s/{bpm}bpm", samples, lambda s=settings: export_to_temp(s)))
+
+    return cases
+
+def export_to_temp(settings):
+    path = os.path.join(tempfile.gettempdir(), "benchmark_render.wav")
+    try:
+        music_generation.export_settings(settings, path)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+def measure(run, samples, repeat):
+    timings = []
+    for _ in range(repeat):
+        reset_caches()
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    # Peak memory is measured on a separate pass because tracing slows the timed runs down
+    reset_caches()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    wall = min(timings)
+    return {"wall_s": wall, "samples_per_s": samples / wall if wall else None, "peak_bytes": peak, "samples": samples}
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous and result["wall_s"] > previous["wall_s"] * (1 + tolerance):
+            regressions.append((name, previous["wall_s"], result["wall_s"]))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the synthesis, drum, effects and export stages.")
+    parser.add_argument("--full", action="store_true", help="run the full grid (up to 10 minute sections and 64 sections)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case; the fastest is kept")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--output", default="benchmark_results.json", help="where to write the results")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown before a case counts as a regression")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, samples, run in build_cases(FULL_GRID if args.full else QUICK_GRID):
+        if args.filter not in name:
+            continue
+        results[name] = measure(run, samples, args.repeat)
+        result = results[name]
+        print(f"{name:<48}{result['wall_s'] * 1000:10.1f} ms{result['samples_per_s'] / 1e6:10.2f} Msamples/s{result['peak_bytes'] / 2 ** 20:10.1f} MiB")
+
+    report = {
+        "meta": {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+                 "sample_rate": SAMPLE_RATE, "grid": "full" if args.full else "quick", "repeat": args.repeat},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,3 @@
-import tkinter as tk
-
 CHORD_FREQUENCIES = {
     "C": 261.63,
     "C#": 277.18,
@@ -49,6 +47,9 @@ chords = []
 copied_chord = None
 
 def add_chord(chord_name_var, chord_type_var, octave_var, arpeggio_var, apply_settings_var, chords, chord_listbox, duration_entry, bpm_entry, time_signature_entry, volume_entry, reverb_entry, echo_delay_entry, echo_decay_entry, chords_var, drums_var):
+    import tkinter as tk  # Imported here so headless renders can use the chord tables without Tk
+    from progression import Chord
+
     apply_settings = apply_settings_var.get()
 
     try:
@@ -94,15 +95,13 @@ def add_chord(chord_name_var, chord_type_var, octave_var, arpeggio_var, apply_se
     
     if chord_name in CHORD_FREQUENCIES and chord_type in CHORD_TYPES:
         if apply_settings:
-            chords.append((chord_name, chord_type, arpeggio, include_drums, include_chords, duration, bpm, time_signature, volume_db, reverb_decay, echo_delay_ms, echo_decay, octave))
+            chord = Chord(chord_name, chord_type, arpeggio, include_drums, include_chords, duration, bpm, time_signature, volume_db, reverb_decay, echo_delay_ms, echo_decay, octave)
         else:
             # Default values if apply settings is not checked
-            chords.append((chord_name, chord_type, arpeggio, include_drums, include_chords, 60, 120, "4/4", -10, 0.5, 300, 0.5, 4))
-        
-        arpeggio_text = " (Arpeggio)" if arpeggio else ""
-        drum_text = " (Drums)" if include_drums else ""
-        chord_text = " (Chords)" if include_chords else ""
-        chord_listbox.insert(tk.END, f"{chord_name}{octave} {chord_type}{arpeggio_text}{drum_text}{chord_text}")
+            chord = Chord(chord_name, chord_type, arpeggio, include_drums, include_chords)
+
+        chords.append(chord)
+        chord_listbox.insert(tk.END, chord.label)
     else:
         print("Invalid chord name or type. Please select valid options.")
 
@@ -113,5 +112,6 @@ def remove_chord(chords, chord_listbox):
         del chords[index]
 
 def clear_chords(chords, chord_listbox):
+    import tkinter as tk
     chord_listbox.delete(0, tk.END)
     chords.clear()
@@ -0,0 +1,148 @@
+import numpy as np
+from impulses import DEFAULT_IMPULSE, get_impulse
+from synthesis import SAMPLE_RATE, db_to_gain, samples_for
+
+# Effects process float blocks in order and may modify the block in place.
+# Any state they need (such as the playhead position) carries over to the next block,
+# and flush() returns whatever the effect still rings out after the last block.
+
+# Partition length for the reverb; the wet signal lags the dry one by this much, acting as a short pre-delay
+REVERB_PARTITION = 2048
+
+class Reverb:
+    # Uniformly partitioned overlap-add convolution: each partition of the impulse response is
+    # multiplied with the spectrum of the input partition it lines up with, so cost grows with
+    # track length x log(partition), not with track length x impulse length
+    def __init__(self, decay=0.5, impulse=DEFAULT_IMPULSE, sample_rate=SAMPLE_RATE, partition=REVERB_PARTITION, max_samples=None):
+        ir = get_impulse(impulse, sample_rate)[:max_samples]
+        self.partition = partition
+        self.wet_gain = db_to_gain(-decay)
+        count = max(1, -(-len(ir) // partition))
+        padded = np.zeros(count * partition, dtype=np.float32)
+        padded[:len(ir)] = ir
+        self.ir_length = len(ir)
+        self.ir_spectra = np.fft.rfft(padded.reshape(count, partition), n=2 * partition, axis=1)
+        # Spectra of the last count - 1 input partitions, oldest first
+        self.history = np.zeros((count - 1, partition + 1), dtype=np.complex128)
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.overlap = np.zeros(partition, dtype=np.float32)
+        self.wet = np.zeros(partition, dtype=np.float32)
+
+    def process(self, block):
+        size = self.partition
+        pending = np.concatenate([self.pending, block])
+        full = len(pending) // size * size
+        self.pending = pending[full:]
+
+        if full:
+            spectra = np.fft.rfft(pending[:full].reshape(-1, size), n=2 * size, axis=1)
+            frames = np.concatenate([self.history, spectra])
+            count = len(self.ir_spectra)
+            mixed = np.zeros_like(spectra)
+            for index, ir_spectrum in enumerate(self.ir_spectra):
+                mixed += frames[count - 1 - index:count - 1 - index + len(spectra)] * ir_spectrum
+            self.history = frames[len(frames) - (count - 1):]
+
+            output = np.fft.irfft(mixed, n=2 * size, axis=1).astype(np.float32)
+            heads = output[:, :size]
+            heads[0] += self.overlap
+            heads[1:] += output[:-1, size:]
+            self.overlap = output[-1, size:].copy()
+            self.wet = np.concatenate([self.wet, heads.ravel()])
+
+        wet, self.wet = self.wet[:len(block)], self.wet[len(block):]
+        block += wet * self.wet_gain
+        return block
+
+    def flush(self):
+        return self.process(np.zeros(self.ir_length + 2 * self.partition, dtype=np.float32))
+
+# Echoes below this level are dropped when the delay line is flushed
+ECHO_FLOOR = 1e-3
+
+class Echo:
+    # A feedback delay line read at several taps: the k-th repeat of the input is
+    # delay * k samples late and level * feedback ** (k - 1) loud. The schedule lists
+    # (start_sample, delay_samples, level) so each section can use its own settings; a delay of 0 bypasses the echo.
+    def __init__(self, delay_ms=300, decay=0.5, sample_rate=SAMPLE_RATE, taps=3, feedback=0.5, schedule=None):
+        self.schedule = schedule or [(0, max(0, samples_for(delay_ms, sample_rate)), db_to_gain(-decay))]
+        self.taps = taps
+        self.feedback = feedback
+        self.history = np.zeros(taps * max(delay for _, delay, _ in self.schedule), dtype=np.float32)
+        self.position = 0
+
+    def process(self, block):
+        # Split the block where a new section's settings take over
+        starts = [start - self.position for start, _, _ in self.schedule if 0 < start - self.position < len(block)]
+        for begin, end in zip([0] + starts, starts + [len(block)]):
+            _, delay, level = self.settings_at(self.position + begin)
+            self._process(block[begin:end], delay, level)
+        self.position += len(block)
+        return block
+
+    def settings_at(self, position):
+        current = self.schedule[0]
+        for entry in self.schedule:
+            if entry[0] > position:
+                break
+            current = entry
+        return current
+
+    def _process(self, block, delay, level):
+        size = len(self.history)
+        if delay <= 0:
+            # An Echo Delay of 0 ms leaves the block dry, as it always has; the delay line just moves past it
+            keep = max(size - len(block), 0)
+            self.history = np.concatenate([self.history[size - keep:], np.zeros(size - keep, dtype=np.float32)])
+            return
+
+        line = np.concatenate([self.history, np.empty(len(block), dtype=np.float32)])
+        loop_length = self.taps * delay
+        tap_gains = level * self.feedback ** np.arange(self.taps)
+        recirculate = self.feedback ** self.taps
+
+        # Every read is at least one delay back, so up to delay samples are computed per step
+        for start in range(0, len(block), delay):
+            dry = block[start:start + delay]
+            write = size + start
+            line[write:write + len(dry)] = dry + recirculate * line[write - loop_length:write - loop_length + len(dry)]
+            for tap, gain in enumerate(tap_gains, 1):
+                dry += gain * line[write - tap * delay:write - tap * delay + len(dry)]
+
+        self.history = line[len(line) - size:].copy()
+
+    def flush(self):
+        _, delay, level = self.settings_at(self.position)
+        repeats = self.taps
+        if 0 < self.feedback < 1 and level > ECHO_FLOOR:
+            repeats = max(repeats, int(np.ceil(np.log(ECHO_FLOOR / level) / np.log(self.feedback))) + 1)
+        return self.process(np.zeros(repeats * delay, dtype=np.float32))
+
+def echo_schedule(progression, sample_rate=SAMPLE_RATE):
+    starts = progression.offsets(sample_rate)[:-1]
+    delays = np.maximum(0, (sample_rate * (progression.data["echo_delay_ms"] / 1000.0)).astype(np.int64))
+    levels = db_to_gain(-progression.data["echo_decay"])
+    return [(int(start), int(delay), float(level)) for start, delay, level in zip(starts, delays, levels)]
+
+# Draft renders cut the reverb tail short; only the first part of the impulse response is convolved
+DRAFT_REVERB_MS = 500
+
+def effect_chain(progression, sample_rate=SAMPLE_RATE, quality="full", impulse=DEFAULT_IMPULSE):
+    # Reverb uses the first chord's setting for the whole mix; the echo follows each section.
+    # impulse is an IMPULSE_PRESETS name or a path to a WAV impulse response.
+    max_samples = samples_for(DRAFT_REVERB_MS, sample_rate) if quality == "draft" else None
+    return [Reverb(decay=progression[0].reverb_decay, impulse=impulse, sample_rate=sample_rate, max_samples=max_samples),
+            Echo(sample_rate=sample_rate, schedule=echo_schedule(progression, sample_rate))]
+
+def apply_effects(block, effects):
+    for effect in effects:
+        block = effect.process(block)
+    return block
+
+def flush_effects(effects):
+    # Each effect's tail still has to pass through the effects after it
+    tail = np.zeros(0, dtype=np.float32)
+    for effect in effects:
+        processed = effect.process(tail) if len(tail) else tail
+        tail = np.concatenate([processed, effect.flush()])
+    return tail
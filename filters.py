@@ -0,0 +1,95 @@
+import numpy as np
+from synthesis import SAMPLE_RATE, db_to_gain
+
+# Samples filtered per FFT pass; the recursion is solved exactly within each chunk
+FILTER_CHUNK = 4096
+
+# Default filter for each instrument: (kind, cutoff_hz, q)
+INSTRUMENT_FILTERS = {
+    "kick": ("lowpass", 60, 0.707),
+    "snare": ("highpass", 1000, 0.707),
+    "hi_hat": ("highpass", 5000, 0.707),
+    "tom": ("lowpass", 200, 0.707),
+    "crash": ("highpass", 2000, 0.707),
+    "noise": ("lowpass", 500, 0.707),
+}
+
+def biquad_coefficients(kind, cutoff, sample_rate=SAMPLE_RATE, q=0.707, gain_db=0.0):
+    # Audio EQ Cookbook (RBJ) formulas, normalized so a0 == 1
+    w0 = 2 * np.pi * min(cutoff, sample_rate * 0.499) / sample_rate
+    cos_w0, alpha = np.cos(w0), np.sin(w0) / (2 * q)
+    amp = np.sqrt(db_to_gain(gain_db))
+
+    if kind == "lowpass":
+        b = [(1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2]
+        a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    elif kind == "highpass":
+        b = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2]
+        a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    elif kind == "bandpass":
+        b = [alpha, 0.0, -alpha]
+        a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    elif kind in ("lowshelf", "highshelf"):
+        sign = 1 if kind == "lowshelf" else -1
+        root = 2 * np.sqrt(amp) * alpha
+        b = [amp * ((amp + 1) - sign * (amp - 1) * cos_w0 + root),
+             sign * 2 * amp * ((amp - 1) - sign * (amp + 1) * cos_w0),
+             amp * ((amp + 1) - sign * (amp - 1) * cos_w0 - root)]
+        a = [(amp + 1) + sign * (amp - 1) * cos_w0 + root,
+             -sign * 2 * ((amp - 1) + sign * (amp + 1) * cos_w0),
+             (amp + 1) + sign * (amp - 1) * cos_w0 - root]
+    else:
+        raise ValueError(f"Unknown filter type {kind!r}")
+
+    return np.array(b) / a[0], np.array(a) / a[0]
+
+def transition_powers(matrix, count):
+    # matrix ** 0 .. matrix ** (count - 1), doubling the computed range each step
+    powers = np.eye(len(matrix))[np.newaxis]
+    while len(powers) < count:
+        powers = np.concatenate([powers, powers @ (powers[-1] @ matrix)])
+    return powers[:count]
+
+class Biquad:
+    # Direct form II transposed, evaluated a chunk at a time: the output is the input convolved
+    # with the filter's impulse response (via FFT) plus the decay of the state carried in
+    def __init__(self, kind, cutoff, sample_rate=SAMPLE_RATE, q=0.707, gain_db=0.0, chunk=FILTER_CHUNK):
+        self.b, self.a = biquad_coefficients(kind, cutoff, sample_rate, q, gain_db)
+        self.chunk = chunk
+        self.state = np.zeros(2)
+
+        # With no input the state evolves as state' = A @ state and the output is state[0], so the impulse
+        # response and the decay of each state slot all come from the first row of the powers of A
+        (b0, b1, b2), (_, a1, a2) = self.b, self.a
+        powers = transition_powers(np.array([[-a1, 1.0], [-a2, 0.0]]), chunk)
+        impulse = np.empty(chunk)
+        impulse[0] = b0
+        impulse[1:] = powers[:-1, 0] @ np.array([b1 - a1 * b0, b2 - a2 * b0])
+        self.impulse_spectrum = np.fft.rfft(impulse, n=2 * chunk)
+        self.state_responses = powers[:, 0].T
+
+    def process(self, block):
+        out = np.empty(len(block), dtype=np.float32)
+        for start in range(0, len(block), self.chunk):
+            x = np.asarray(block[start:start + self.chunk], dtype=np.float64)
+            count = len(x)
+            y = np.fft.irfft(np.fft.rfft(x, n=2 * self.chunk) * self.impulse_spectrum, n=2 * self.chunk)[:count]
+            y += self.state @ self.state_responses[:, :count]
+            self._update_state(x, y)
+            out[start:start + count] = y
+        return out
+
+    def _update_state(self, x, y):
+        (_, b1, b2), (_, a1, a2) = self.b, self.a
+        z2_before = b2 * x[-2] - a2 * y[-2] if len(x) > 1 else self.state[1]
+        self.state = np.array([b1 * x[-1] - a1 * y[-1] + z2_before, b2 * x[-1] - a2 * y[-1]])
+
+    def reset(self):
+        self.state = np.zeros(2)
+
+def instrument_filter(name, sample_rate=SAMPLE_RATE):
+    kind, cutoff, q = INSTRUMENT_FILTERS[name]
+    return Biquad(kind, cutoff, sample_rate, q)
+
+def filter_samples(name, samples, sample_rate=SAMPLE_RATE):
+    return instrument_filter(name, sample_rate).process(samples)
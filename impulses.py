@@ -0,0 +1,61 @@
+import os
+import wave
+import numpy as np
+from render_cache import impulse_cache
+from synthesis import SAMPLE_RATE, MAX_AMPLITUDE
+
+# Generated rooms: RT60 decay time in seconds, early reflection delays in ms and a damping factor
+IMPULSE_PRESETS = {
+    "room": {"rt60": 0.4, "reflections_ms": (7, 13, 19), "damping": 0.3},
+    "hall": {"rt60": 1.8, "reflections_ms": (19, 31, 47, 61), "damping": 0.5},
+    "dungeon": {"rt60": 3.2, "reflections_ms": (23, 41, 67, 89, 113), "damping": 0.7},
+}
+
+DEFAULT_IMPULSE = "dungeon"
+
+def generate_impulse(preset=DEFAULT_IMPULSE, sample_rate=SAMPLE_RATE, seed=0):
+    params = IMPULSE_PRESETS[preset]
+    length = int(params["rt60"] * sample_rate)
+    t = np.arange(length) / sample_rate
+    rng = np.random.default_rng(seed)
+
+    # Diffuse tail: noise falling 60 dB over rt60, with highs dying faster than lows
+    tail = rng.standard_normal(length) * np.exp(-6.9 * t / params["rt60"])
+    smoothing = max(1, int(params["damping"] * 8))
+    smoothed = np.convolve(tail, np.ones(smoothing) / smoothing, mode="same")
+    fade = np.clip(t / params["rt60"], 0.0, 1.0)
+    impulse = tail * (1 - fade) + smoothed * fade
+
+    for index, delay_ms in enumerate(params["reflections_ms"]):
+        position = int(delay_ms * sample_rate / 1000)
+        if position < length:
+            impulse[position] += rng.choice((-1.0, 1.0)) * 3.0 / (index + 1)
+    return normalize_impulse(impulse)
+
+def load_impulse(path, sample_rate=SAMPLE_RATE):
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"Impulse response '{path}' must be 16-bit PCM")
+        channels = wav.getnchannels()
+        rate = wav.getframerate()
+        frames = np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2")
+
+    # Mix down to mono and resample to the render rate
+    impulse = frames.reshape(-1, channels).mean(axis=1) / MAX_AMPLITUDE
+    if rate != sample_rate and len(impulse):
+        positions = np.arange(int(len(impulse) * sample_rate / rate)) * (rate / sample_rate)
+        impulse = np.interp(positions, np.arange(len(impulse)), impulse)
+    return normalize_impulse(impulse)
+
+def normalize_impulse(impulse):
+    # Unit energy, so the wet signal sits at about the level of the dry one
+    energy = np.sqrt(np.sum(np.square(impulse)))
+    return (impulse / energy if energy else impulse).astype(np.float32)
+
+def get_impulse(name=DEFAULT_IMPULSE, sample_rate=SAMPLE_RATE):
+    # name is a preset or a path to a WAV impulse response
+    if name in IMPULSE_PRESETS:
+        return impulse_cache.get_or_create((name, sample_rate), lambda: generate_impulse(name, sample_rate))
+    if os.path.isfile(name):
+        return impulse_cache.get_or_create((os.path.abspath(name), os.path.getmtime(name), sample_rate), lambda: load_impulse(name, sample_rate))
+    raise ValueError(f"Unknown impulse response {name!r}")
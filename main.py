@@ -1,15 +1,23 @@
+from startup import timed_import, import_report
+import sys
 import tkinter as tk
 from tkinter import ttk
 from chord_management import add_chord, remove_chord, clear_chords, chords, CHORD_FREQUENCIES, CHORD_TYPES
-from music_generation import generate_music, generate_chord, generate_arpeggio, generate_drum_beat, generate_atmospheric_noise, apply_reverb, apply_echo
+from render_worker import RenderWorker
 from settings_management import save_settings, load_settings
-from pydub import AudioSegment
-import numpy as np
-import pygame
 
-pygame.mixer.init()
+# numpy, pydub, pygame and the render modules load on first use (via timed_import) so the window appears quickly
 
 copied_chord = None
+preview_channel = None
+# Cancel event of the song preview job, set by stop_preview while it is still rendering or streaming
+preview_cancel = None
+
+# impulses.IMPULSE_PRESETS names, listed here so the window doesn't load numpy; a WAV path can be typed instead
+REVERB_IMPULSES = ("dungeon", "hall", "room")
+
+# Preview buttons render at this RENDER_QUALITY setting; Generate Music always renders at full quality
+PREVIEW_QUALITY = "draft"
 
 def calculate_duration():
     try:
@@ -72,12 +80,9 @@ def save_chord_settings():
             echo_decay = 0.5  # Default to 0.5 if invalid or empty
 
         if chord_name in CHORD_FREQUENCIES and chord_type in CHORD_TYPES:
-            chords[index] = (chord_name, chord_type, arpeggio, include_drums, include_chords, duration, bpm, time_signature, volume, reverb_decay, echo_delay, echo_decay, octave)
-            arpeggio_text = " (Arpeggio)" if arpeggio else ""
-            drum_text = " (Drums)" if include_drums else ""
-            chord_text = " (Chords)" if include_chords else ""
+            chords[index] = timed_import("progression").Chord(chord_name, chord_type, arpeggio, include_drums, include_chords, duration, bpm, time_signature, volume, reverb_decay, echo_delay, echo_decay, octave)
             chord_listbox.delete(index)
-            chord_listbox.insert(index, f"{chord_name}{octave} {chord_type}{arpeggio_text}{drum_text}{chord_text}")
+            chord_listbox.insert(index, chords[index].label)
             chord_listbox.select_set(index)
         else:
             status_label.config(text="Invalid chord name or type. Please select valid options.")
@@ -86,26 +91,26 @@ def on_double_click(event):
     selected_index = chord_listbox.curselection()
     if selected_index:
         chord = chords[selected_index[0]]
-        chord_name_var.set(chord[0])
-        chord_type_var.set(chord[1])
-        octave_var.set(str(chord[12]))
-        arpeggio_var.set(chord[2])
+        chord_name_var.set(chord.name)
+        chord_type_var.set(chord.type)
+        octave_var.set(str(chord.octave))
+        arpeggio_var.set(chord.arpeggio)
         duration_entry.delete(0, tk.END)
-        duration_entry.insert(0, chord[5])
+        duration_entry.insert(0, chord.duration)
         bpm_entry.delete(0, tk.END)
-        bpm_entry.insert(0, chord[6])
+        bpm_entry.insert(0, chord.bpm)
         time_signature_entry.delete(0, tk.END)
-        time_signature_entry.insert(0, chord[7])
+        time_signature_entry.insert(0, chord.time_signature)
         volume_entry.delete(0, tk.END)
-        volume_entry.insert(0, chord[8])
+        volume_entry.insert(0, chord.volume_db)
         reverb_entry.delete(0, tk.END)
-        reverb_entry.insert(0, chord[9])
+        reverb_entry.insert(0, chord.reverb_decay)
         echo_delay_entry.delete(0, tk.END)
-        echo_delay_entry.insert(0, chord[10])
+        echo_delay_entry.insert(0, chord.echo_delay_ms)
         echo_decay_entry.delete(0, tk.END)
-        echo_decay_entry.insert(0, chord[11])
-        chords_var.set(chord[4])
-        drums_var.set(chord[3])
+        echo_decay_entry.insert(0, chord.echo_decay)
+        chords_var.set(chord.include_chords)
+        drums_var.set(chord.include_drums)
 
 def copy_chord():
     global copied_chord
@@ -117,10 +122,7 @@ def paste_chord():
     global copied_chord
     if copied_chord:
         chords.append(copied_chord)
-        arpeggio_text = " (Arpeggio)" if copied_chord[2] else ""
-        drum_text = " (Drums)" if copied_chord[3] else ""
-        chord_text = " (Chords)" if copied_chord[4] else ""
-        chord_listbox.insert(tk.END, f"{copied_chord[0]}{copied_chord[12]} {copied_chord[1]}{arpeggio_text}{drum_text}{chord_text}")
+        chord_listbox.insert(tk.END, copied_chord.label)
 
 def move_up():
     selected_index = chord_listbox.curselection()
@@ -151,216 +153,216 @@ def move_down():
             chord_listbox.activate(index+1)
 
 def preview_chord(chords, chord_listbox):
+    global preview_channel
     selected_index = chord_listbox.curselection()
     if selected_index:
+        stop_preview()
+        music_generation = timed_import("music_generation")
         chord = chords[selected_index[0]]
-        base_freq = CHORD_FREQUENCIES[chord[0]] * (2 ** (chord[12] - 4))
-        intervals = CHORD_TYPES[chord[1]]
-        if chord[2]:  # If arpeggio
-            chord_audio = generate_arpeggio(base_freq, intervals, chord[5] * 1000, chord[8])
-        else:
-            chord_audio = generate_chord(base_freq, intervals, chord[5] * 1000, chord[8])
-        
-        if chord[3]:  # If drums
-            drum_audio = generate_drum_beat(chord[5] * 1000, chord[6], chord[7], chord[8])
-            chord_audio = chord_audio.overlay(drum_audio)
-
-        play_audio(chord_audio)
-
-def play_audio(audio_segment):
-    # Convert AudioSegment to numpy array
-    audio_data = np.array(audio_segment.get_array_of_samples())
-
-    # Make sure audio data is contiguous
-    if not audio_data.flags['C_CONTIGUOUS']:
-        audio_data = np.ascontiguousarray(audio_data)
-
-    # Convert to a format pygame can use
-    audio_data = audio_data.reshape(-1, audio_segment.channels)
-
-    sound = pygame.sndarray.make_sound(audio_data)
-    sound.play()
+        # One bar looped in the mixer, whatever the chord's duration
+        samples = music_generation.render_audition(chord, PREVIEW_QUALITY)
+        sample_rate = music_generation.RENDER_QUALITY[PREVIEW_QUALITY]["sample_rate"]
+        preview_channel = timed_import("playback").loop_sound(samples, sample_rate)
+        status_label.config(text=f"Auditioning {chord.label} (Stop to end)")
+
+def stop_preview():
+    global preview_channel, preview_cancel
+    if preview_cancel is not None:
+        preview_cancel.set()
+        preview_cancel = None
+    if preview_channel is not None:
+        preview_channel.stop()
+        preview_channel = None
+
+def stop_playback():
+    stop_preview()
+    render_worker.cancel()
 
 def preview_song(chords, chords_var, drums_var, noise_var):
-    try:
-        base_freqs = [CHORD_FREQUENCIES[chord[0]] for chord in chords]
-        chord_intervals = [CHORD_TYPES[chord[1]] for chord in chords]
-        is_arpeggio = [chord[2] for chord in chords]
-        has_drums = [chord[3] for chord in chords]
-        has_chords = [chord[4] for chord in chords]
-        durations = [chord[5] for chord in chords]
-        bpms = [chord[6] for chord in chords]
-        time_signatures = [chord[7] for chord in chords]
-        volumes = [chord[8] for chord in chords]
-        reverb_decays = [chord[9] for chord in chords]
-        echo_delays = [chord[10] for chord in chords]
-        echo_decays = [chord[11] for chord in chords]
-
-        music = AudioSegment.silent(duration=0)
-        full_drum_track = AudioSegment.silent(duration=0)
-
-        # Generate music and drum sections separately
-        for base_freq, intervals, arpeggio, drums, chords, dur, bpm, ts, vol, rvb, edly, edcy in zip(
-                base_freqs, chord_intervals, is_arpeggio, has_drums, has_chords, durations, bpms, time_signatures, volumes, reverb_decays, echo_delays, echo_decays):
-
-            duration_ms_per_chord = dur * 1000
-
-            if arpeggio:
-                section = generate_arpeggio(base_freq, intervals, duration_ms_per_chord, vol)
-            else:
-                section = generate_chord(base_freq, intervals, duration_ms_per_chord, vol)
-
-            if chords_var.get() and chords:
-                music += section
-            else:
-                music += AudioSegment.silent(duration=duration_ms_per_chord)
-
-            drum_section = generate_drum_beat(duration_ms_per_chord, bpm, ts, vol) if drums else AudioSegment.silent(duration=duration_ms_per_chord)
-            full_drum_track += drum_section
-
-        if noise_var.get():
-            atmospheric_noise = generate_atmospheric_noise(len(music), volumes[0])  # Use the first volume value for noise
-            music = music.overlay(atmospheric_noise)
-
-        music = music.overlay(full_drum_track)
-        music = apply_reverb(music, decay=reverb_decays[0])
-        music = apply_echo(music, delay_ms=echo_delays[0], decay=echo_decays[0])
-
-        play_audio(music)
-
-    except Exception as e:
-        status_label.config(text=f"Error previewing song: {str(e)}")
-
-# Initialize GUI
-root = tk.Tk()
-root.title("automatic shallot v0.3")
-
-frame = ttk.Frame(root, padding="10")
-frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-
-# Chord Management
-ttk.Label(frame, text="Add Chord").grid(column=0, row=0, sticky=tk.W)
-
-chord_name_var = tk.StringVar()
-chord_name_menu = ttk.OptionMenu(frame, chord_name_var, "C", *CHORD_FREQUENCIES.keys())
-chord_name_menu.grid(column=1, row=0, sticky=(tk.W, tk.E))
-
-chord_type_var = tk.StringVar()
-chord_type_menu = ttk.OptionMenu(frame, chord_type_var, "Major", *CHORD_TYPES.keys())
-chord_type_menu.grid(column=2, row=0, sticky=(tk.W, tk.E))
-
-octave_var = tk.StringVar(value="4")
-octave_menu = ttk.OptionMenu(frame, octave_var, "4", "0", "1", "2", "3", "4", "5", "6", "7", "8")
-octave_menu.grid(column=3, row=0, sticky=(tk.W, tk.E))
-
-arpeggio_var = tk.BooleanVar()
-arpeggio_checkbox = ttk.Checkbutton(frame, text="Arpeggio", variable=arpeggio_var)
-arpeggio_checkbox.grid(column=4, row=0, sticky=(tk.W, tk.E))
-
-apply_settings_var = tk.BooleanVar()
-apply_settings_checkbox = ttk.Checkbutton(frame, text="Apply Settings to Chord", variable=apply_settings_var)
-apply_settings_checkbox.grid(column=5, row=0, sticky=(tk.W, tk.E))
+    global preview_cancel
+    # Snapshot the progression and options on the Tk thread; the worker never touches widgets
+    song = list(chords)
+    include_chords = chords_var.get()
+    include_noise = noise_var.get()
+    impulse = impulse_var.get()
+
+    # The job returns once the first block plays; the player thread renders later sections while earlier ones play
+    def job(progress, cancel_event):
+        music_generation = timed_import("music_generation")
+        playback = timed_import("playback")
+        blocks = music_generation.stream_preview(song, include_chords, include_noise, progress=progress, cancel_event=cancel_event, quality=PREVIEW_QUALITY, impulse=impulse)
+        return playback.play_stream(blocks, cancel_event, sample_rate=music_generation.RENDER_QUALITY[PREVIEW_QUALITY]["sample_rate"],
+                                    on_error=lambda e: render_worker.post(lambda: status_label.config(text=f"Error previewing song: {str(e)}")))
+
+    def started(player):
+        global preview_channel
+        preview_channel = player
+        status_label.config(text="Previewing song")
+
+    stop_preview()
+    preview_cancel = render_worker.submit("Previewing song", job, on_done=started, trace=trace_var.get())
+
+def start_generate_music():
+    settings = {"chords": list(chords), "loops": loop_entry.get(), "include_chords": chords_var.get(), "include_noise": noise_var.get(),
+                "reverb_impulse": impulse_var.get()}
+    render_worker.submit("Generating music",
+                         lambda progress, cancel_event: timed_import("music_generation").export_settings(settings, progress=progress, cancel_event=cancel_event),
+                         on_done=lambda text: status_label.config(text=text), trace=trace_var.get())
+
+# The GUI only starts when run directly, so render pool processes can import this module safely
+if __name__ == "__main__":
+    # Initialize GUI
+    root = tk.Tk()
+    root.title("automatic shallot v0.3")
+
+    frame = ttk.Frame(root, padding="10")
+    frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+    # Chord Management
+    ttk.Label(frame, text="Add Chord").grid(column=0, row=0, sticky=tk.W)
+
+    chord_name_var = tk.StringVar()
+    chord_name_menu = ttk.OptionMenu(frame, chord_name_var, "C", *CHORD_FREQUENCIES.keys())
+    chord_name_menu.grid(column=1, row=0, sticky=(tk.W, tk.E))
+
+    chord_type_var = tk.StringVar()
+    chord_type_menu = ttk.OptionMenu(frame, chord_type_var, "Major", *CHORD_TYPES.keys())
+    chord_type_menu.grid(column=2, row=0, sticky=(tk.W, tk.E))
+
+    octave_var = tk.StringVar(value="4")
+    octave_menu = ttk.OptionMenu(frame, octave_var, "4", "0", "1", "2", "3", "4", "5", "6", "7", "8")
+    octave_menu.grid(column=3, row=0, sticky=(tk.W, tk.E))
+
+    arpeggio_var = tk.BooleanVar()
+    arpeggio_checkbox = ttk.Checkbutton(frame, text="Arpeggio", variable=arpeggio_var)
+    arpeggio_checkbox.grid(column=4, row=0, sticky=(tk.W, tk.E))
+
+    apply_settings_var = tk.BooleanVar()
+    apply_settings_checkbox = ttk.Checkbutton(frame, text="Apply Settings to Chord", variable=apply_settings_var)
+    apply_settings_checkbox.grid(column=5, row=0, sticky=(tk.W, tk.E))
+
+    add_chord_button = ttk.Button(frame, text="Add Chord", command=lambda: add_chord(chord_name_var, chord_type_var, octave_var, arpeggio_var, apply_settings_var, chords, chord_listbox, duration_entry, bpm_entry, time_signature_entry, volume_entry, reverb_entry, echo_delay_entry, echo_decay_entry, chords_var, drums_var))
+    add_chord_button.grid(column=6, row=0, sticky=(tk.W, tk.E))
+
+    save_chord_button = ttk.Button(frame, text="Save Chord Settings", command=save_chord_settings)
+    save_chord_button.grid(column=6, row=1, sticky=(tk.W, tk.E))
+
+    chord_listbox = tk.Listbox(frame, height=10)
+    chord_listbox.grid(column=0, row=1, columnspan=6, sticky=(tk.W, tk.E))
+    remove_chord_button = ttk.Button(frame, text="Remove Selected Chord", command=lambda: remove_chord(chords, chord_listbox))
+    remove_chord_button.grid(column=6, row=2, sticky=(tk.W, tk.E))
+    clear_chords_button = ttk.Button(frame, text="Clear All Chords", command=lambda: clear_chords(chords, chord_listbox))
+    clear_chords_button.grid(column=6, row=3, sticky=(tk.W, tk.E))
+
+    # Duration, BPM, Volume, Reverb, Echo Settings, and Checkboxes
+    ttk.Label(frame, text="Duration (seconds)").grid(column=0, row=4, sticky=tk.W)
+    duration_entry = ttk.Entry(frame)
+    duration_entry.grid(column=1, row=4, sticky=(tk.W, tk.E))
+
+    ttk.Label(frame, text="BPM").grid(column=0, row=5, sticky=tk.W)
+    bpm_entry = ttk.Entry(frame)
+    bpm_entry.grid(column=1, row=5, sticky=(tk.W, tk.E))
+
+    ttk.Label(frame, text="Time Signature (e.g., 4/4)").grid(column=0, row=6, sticky=tk.W)
+    time_signature_entry = ttk.Entry(frame)
+    time_signature_entry.grid(column=1, row=6, sticky=(tk.W, tk.E))
 
-add_chord_button = ttk.Button(frame, text="Add Chord", command=lambda: add_chord(chord_name_var, chord_type_var, octave_var, arpeggio_var, apply_settings_var, chords, chord_listbox, duration_entry, bpm_entry, time_signature_entry, volume_entry, reverb_entry, echo_delay_entry, echo_decay_entry, chords_var, drums_var))
-add_chord_button.grid(column=6, row=0, sticky=(tk.W, tk.E))
+    ttk.Label(frame, text="Volume (dB)").grid(column=0, row=7, sticky=tk.W)
+    volume_entry = ttk.Entry(frame)
+    volume_entry.grid(column=1, row=7, sticky=(tk.W, tk.E))
 
-save_chord_button = ttk.Button(frame, text="Save Chord Settings", command=save_chord_settings)
-save_chord_button.grid(column=6, row=1, sticky=(tk.W, tk.E))
+    ttk.Label(frame, text="Reverb Decay").grid(column=0, row=8, sticky=tk.W)
+    reverb_entry = ttk.Entry(frame)
+    reverb_entry.grid(column=1, row=8, sticky=(tk.W, tk.E))
 
-chord_listbox = tk.Listbox(frame, height=10)
-chord_listbox.grid(column=0, row=1, columnspan=6, sticky=(tk.W, tk.E))
-remove_chord_button = ttk.Button(frame, text="Remove Selected Chord", command=lambda: remove_chord(chords, chord_listbox))
-remove_chord_button.grid(column=6, row=2, sticky=(tk.W, tk.E))
-clear_chords_button = ttk.Button(frame, text="Clear All Chords", command=lambda: clear_chords(chords, chord_listbox))
-clear_chords_button.grid(column=6, row=3, sticky=(tk.W, tk.E))
+    ttk.Label(frame, text="Reverb Impulse").grid(column=2, row=8, sticky=tk.W)
+    impulse_var = tk.StringVar(value=REVERB_IMPULSES[0])
+    impulse_menu = ttk.Combobox(frame, textvariable=impulse_var, values=REVERB_IMPULSES)
+    impulse_menu.grid(column=3, row=8, sticky=(tk.W, tk.E))
 
-# Duration, BPM, Volume, Reverb, Echo Settings, and Checkboxes
-ttk.Label(frame, text="Duration (seconds)").grid(column=0, row=4, sticky=tk.W)
-duration_entry = ttk.Entry(frame)
-duration_entry.grid(column=1, row=4, sticky=(tk.W, tk.E))
+    ttk.Label(frame, text="Echo Delay (ms)").grid(column=0, row=9, sticky=tk.W)
+    echo_delay_entry = ttk.Entry(frame)
+    echo_delay_entry.grid(column=1, row=9, sticky=(tk.W, tk.E))
 
-ttk.Label(frame, text="BPM").grid(column=0, row=5, sticky=tk.W)
-bpm_entry = ttk.Entry(frame)
-bpm_entry.grid(column=1, row=5, sticky=(tk.W, tk.E))
+    ttk.Label(frame, text="Echo Decay").grid(column=0, row=10, sticky=tk.W)
+    echo_decay_entry = ttk.Entry(frame)
+    echo_decay_entry.grid(column=1, row=10, sticky=(tk.W, tk.E))
 
-ttk.Label(frame, text="Time Signature (e.g., 4/4)").grid(column=0, row=6, sticky=tk.W)
-time_signature_entry = ttk.Entry(frame)
-time_signature_entry.grid(column=1, row=6, sticky=(tk.W, tk.E))
+    ttk.Label(frame, text="Number of Loops").grid(column=0, row=11, sticky=tk.W)
+    loop_entry = ttk.Entry(frame)
+    loop_entry.grid(column=1, row=11, sticky=(tk.W, tk.E))
 
-ttk.Label(frame, text="Volume (dB)").grid(column=0, row=7, sticky=tk.W)
-volume_entry = ttk.Entry(frame)
-volume_entry.grid(column=1, row=7, sticky=(tk.W, tk.E))
+    ttk.Label(frame, text="Measures").grid(column=0, row=12, sticky=tk.W)
+    measures_entry = ttk.Entry(frame)
+    measures_entry.grid(column=1, row=12, sticky=(tk.W, tk.E))
 
-ttk.Label(frame, text="Reverb Decay").grid(column=0, row=8, sticky=tk.W)
-reverb_entry = ttk.Entry(frame)
-reverb_entry.grid(column=1, row=8, sticky=(tk.W, tk.E))
+    chords_var = tk.BooleanVar(value=True)
+    chords_checkbox = ttk.Checkbutton(frame, text="Include Chords", variable=chords_var)
+    chords_checkbox.grid(column=0, row=13, sticky=tk.W)
 
-ttk.Label(frame, text="Echo Delay (ms)").grid(column=0, row=9, sticky=tk.W)
-echo_delay_entry = ttk.Entry(frame)
-echo_delay_entry.grid(column=1, row=9, sticky=(tk.W, tk.E))
+    drums_var = tk.BooleanVar(value=True)
+    drums_checkbox = ttk.Checkbutton(frame, text="Include Drums", variable=drums_var)
+    drums_checkbox.grid(column=1, row=13, sticky=tk.W)
 
-ttk.Label(frame, text="Echo Decay").grid(column=0, row=10, sticky=tk.W)
-echo_decay_entry = ttk.Entry(frame)
-echo_decay_entry.grid(column=1, row=10, sticky=(tk.W, tk.E))
+    noise_var = tk.BooleanVar(value=True)
+    noise_checkbox = ttk.Checkbutton(frame, text="Include White Noise", variable=noise_var)
+    noise_checkbox.grid(column=2, row=13, sticky=tk.W)
 
-ttk.Label(frame, text="Number of Loops").grid(column=0, row=11, sticky=tk.W)
-loop_entry = ttk.Entry(frame)
-loop_entry.grid(column=1, row=11, sticky=(tk.W, tk.E))
+    # Adds a stage timing summary to the status line and writes render_trace.json (Chrome trace format)
+    trace_var = tk.BooleanVar(value=False)
+    trace_checkbox = ttk.Checkbutton(frame, text="Trace Render", variable=trace_var)
+    trace_checkbox.grid(column=3, row=13, sticky=tk.W)
 
-ttk.Label(frame, text="Measures").grid(column=0, row=12, sticky=tk.W)
-measures_entry = ttk.Entry(frame)
-measures_entry.grid(column=1, row=12, sticky=(tk.W, tk.E))
+    # Generate, Save, Load Buttons and Status Label
+    generate_button = ttk.Button(frame, text="Generate Music", command=start_generate_music)
+    generate_button.grid(column=0, row=14, columnspan=7, sticky=(tk.W, tk.E))
 
-chords_var = tk.BooleanVar(value=True)
-chords_checkbox = ttk.Checkbutton(frame, text="Include Chords", variable=chords_var)
-chords_checkbox.grid(column=0, row=13, sticky=tk.W)
+    save_button = ttk.Button(frame, text="Save Settings", command=lambda: save_settings(chords, duration_entry, bpm_entry, time_signature_entry, volume_entry, reverb_entry, echo_delay_entry, echo_decay_entry, loop_entry, chords_var, drums_var, noise_var, impulse_var, status_label))
+    save_button.grid(column=0, row=15, columnspan=3, sticky=(tk.W, tk.E))
 
-drums_var = tk.BooleanVar(value=True)
-drums_checkbox = ttk.Checkbutton(frame, text="Include Drums", variable=drums_var)
-drums_checkbox.grid(column=1, row=13, sticky=tk.W)
+    load_button = ttk.Button(frame, text="Load Settings", command=lambda: load_settings(chords, chord_listbox, duration_entry, bpm_entry, time_signature_entry, volume_entry, reverb_entry, echo_delay_entry, echo_decay_entry, loop_entry, chords_var, drums_var, noise_var, impulse_var, status_label))
+    load_button.grid(column=3, row=15, columnspan=3, sticky=(tk.W, tk.E))
 
-noise_var = tk.BooleanVar(value=True)
-noise_checkbox = ttk.Checkbutton(frame, text="Include White Noise", variable=noise_var)
-noise_checkbox.grid(column=2, row=13, sticky=tk.W)
+    preview_chord_button = ttk.Button(frame, text="Preview Chord", command=lambda: preview_chord(chords, chord_listbox))
+    preview_chord_button.grid(column=6, row=4, sticky=(tk.W, tk.E))
 
-# Generate, Save, Load Buttons and Status Label
-generate_button = ttk.Button(frame, text="Generate Music", command=lambda: generate_music(chords, duration_entry, bpm_entry, time_signature_entry, volume_entry, reverb_entry, echo_delay_entry, echo_decay_entry, loop_entry, chords_var, drums_var, noise_var, measures_entry, status_label))
-generate_button.grid(column=0, row=14, columnspan=7, sticky=(tk.W, tk.E))
+    preview_song_button = ttk.Button(frame, text="Preview Song", command=lambda: preview_song(chords, chords_var, drums_var, noise_var))
+    preview_song_button.grid(column=6, row=5, sticky=(tk.W, tk.E))
 
-save_button = ttk.Button(frame, text="Save Settings", command=lambda: save_settings(chords, duration_entry, bpm_entry, time_signature_entry, volume_entry, reverb_entry, echo_delay_entry, echo_decay_entry, loop_entry, chords_var, drums_var, noise_var, status_label))
-save_button.grid(column=0, row=15, columnspan=3, sticky=(tk.W, tk.E))
+    status_label = ttk.Label(frame, text="")
+    status_label.grid(column=0, row=16, columnspan=7, sticky=(tk.W, tk.E))
 
-load_button = ttk.Button(frame, text="Load Settings", command=lambda: load_settings(chords, chord_listbox, duration_entry, bpm_entry, time_signature_entry, volume_entry, reverb_entry, echo_delay_entry, echo_decay_entry, loop_entry, chords_var, drums_var, noise_var, status_label))
-load_button.grid(column=3, row=15, columnspan=3, sticky=(tk.W, tk.E))
+    render_worker = RenderWorker(root, status_label)
 
-preview_chord_button = ttk.Button(frame, text="Preview Chord", command=lambda: preview_chord(chords, chord_listbox))
-preview_chord_button.grid(column=6, row=4, sticky=(tk.W, tk.E))
+    # Bind double click event
+    chord_listbox.bind("<Double-1>", on_double_click)
 
-preview_song_button = ttk.Button(frame, text="Preview Song", command=lambda: preview_song(chords, chords_var, drums_var, noise_var))
-preview_song_button.grid(column=6, row=5, sticky=(tk.W, tk.E))
+    # Bind focus out event to time_signature_entry, bpm_entry, and measures_entry
+    time_signature_entry.bind("<FocusOut>", lambda event: calculate_duration())
+    bpm_entry.bind("<FocusOut>", lambda event: calculate_duration())
+    measures_entry.bind("<FocusOut>", lambda event: calculate_duration())
 
-status_label = ttk.Label(frame, text="")
-status_label.grid(column=0, row=16, columnspan=7, sticky=(tk.W, tk.E))
+    # Add copy, paste, move buttons
+    copy_button = ttk.Button(frame, text="Copy", command=copy_chord)
+    copy_button.grid(column=6, row=6, sticky=(tk.W, tk.E))
 
-# Bind double click event
-chord_listbox.bind("<Double-1>", on_double_click)
+    paste_button = ttk.Button(frame, text="Paste", command=paste_chord)
+    paste_button.grid(column=6, row=7, sticky=(tk.W, tk.E))
 
-# Bind focus out event to time_signature_entry, bpm_entry, and measures_entry
-time_signature_entry.bind("<FocusOut>", lambda event: calculate_duration())
-bpm_entry.bind("<FocusOut>", lambda event: calculate_duration())
-measures_entry.bind("<FocusOut>", lambda event: calculate_duration())
+    move_up_button = ttk.Button(frame, text="Move Up", command=move_up)
+    move_up_button.grid(column=6, row=8, sticky=(tk.W, tk.E))
 
-# Add copy, paste, move buttons
-copy_button = ttk.Button(frame, text="Copy", command=copy_chord)
-copy_button.grid(column=6, row=6, sticky=(tk.W, tk.E))
+    move_down_button = ttk.Button(frame, text="Move Down", command=move_down)
+    move_down_button.grid(column=6, row=9, sticky=(tk.W, tk.E))
 
-paste_button = ttk.Button(frame, text="Paste", command=paste_chord)
-paste_button.grid(column=6, row=7, sticky=(tk.W, tk.E))
+    cancel_button = ttk.Button(frame, text="Stop", command=stop_playback)
+    cancel_button.grid(column=6, row=10, sticky=(tk.W, tk.E))
 
-move_up_button = ttk.Button(frame, text="Move Up", command=move_up)
-move_up_button.grid(column=6, row=8, sticky=(tk.W, tk.E))
+    # Pass --import-report to print module import times once the window is up, and again on exit
+    if "--import-report" in sys.argv:
+        root.after_idle(lambda: print(import_report("window shown")))
 
-move_down_button = ttk.Button(frame, text="Move Down", command=move_down)
-move_down_button.grid(column=6, row=9, sticky=(tk.W, tk.E))
+    root.mainloop()
 
-root.mainloop()
+    if "--import-report" in sys.argv:
+        print(import_report("session"))
@@ -1,135 +1,402 @@
-from pydub import AudioSegment
-from pydub.generators import Sine, WhiteNoise
-from chord_management import CHORD_FREQUENCIES, CHORD_TYPES
+from effects import Reverb, Echo, apply_effects, effect_chain, flush_effects
+from filters import filter_samples, instrument_filter
+from impulses import DEFAULT_IMPULSE
+from progression import Progression, as_progression
+from render_cache import drum_hit_cache, noise_cache, section_cache
+from streaming import STREAM_BLOCK_SAMPLES, iter_blocks, write_wav, write_wav_loop, write_wav_memmap
+from synthesis import SAMPLE_RATE, db_to_gain, render_noise, render_partials, render_chord, render_arpeggio, samples_for, to_audio_segment, from_audio_segment
+from tracing import span
+import numpy as np
+import hashlib
 import random
 
 def generate_sine_wave(frequency, duration_ms, volume_db=-10):
-    return Sine(frequency).to_audio_segment(duration=duration_ms).apply_gain(volume_db)
+    return to_audio_segment(render_partials(frequency, samples_for(duration_ms), volume_db))
 
-def generate_white_noise(duration_ms, volume_db=-20):
-    return WhiteNoise().to_audio_segment(duration=duration_ms).apply_gain(volume_db)
+def generate_white_noise(duration_ms, volume_db=-20, seed=0):
+    return to_audio_segment(render_noise(samples_for(duration_ms), volume_db, seed))
 
 def generate_chord(base_freq, intervals, duration_ms, volume_db=-10):
-    chord = AudioSegment.silent(duration=duration_ms)
-    for interval in intervals:
-        freq = base_freq * (2 ** (interval / 12.0))
-        tone = generate_sine_wave(freq, duration_ms, volume_db)
-        chord = chord.overlay(tone)
-    return chord
+    return to_audio_segment(render_chord(base_freq, intervals, duration_ms, volume_db))
 
 def generate_arpeggio(base_freq, intervals, duration_ms, volume_db=-10):
-    note_duration = duration_ms // len(intervals)
-    arpeggio = AudioSegment.silent(duration=0)
-    for interval in intervals:
-        freq = base_freq * (2 ** (interval / 12.0))
-        tone = generate_sine_wave(freq, note_duration, volume_db)
-        arpeggio += tone
-    return arpeggio
+    return to_audio_segment(render_arpeggio(base_freq, intervals, duration_ms, volume_db))
+
+# The atmospheric bed is a short filtered loop tiled across the track; 0 filters noise for the full length instead
+NOISE_LOOP_SAMPLES = 4 * SAMPLE_RATE
+NOISE_CROSSFADE_SAMPLES = SAMPLE_RATE // 4
+
+# Previews trade fidelity for speed; the notes, drum pattern and mix are the same at both settings.
+# Renders are mono throughout, so there is no channel setting to lower.
+RENDER_QUALITY = {
+    "full": {"sample_rate": SAMPLE_RATE, "effects": "full", "noise": True},
+    "draft": {"sample_rate": 22050, "effects": "draft", "noise": False},
+}
+
+def render_noise_loop(volume_db=-30, seed=0, loop_samples=NOISE_LOOP_SAMPLES, crossfade_samples=NOISE_CROSSFADE_SAMPLES, sample_rate=SAMPLE_RATE):
+    loop_samples = loop_samples * sample_rate // SAMPLE_RATE
+    crossfade_samples = crossfade_samples * sample_rate // SAMPLE_RATE
+    key = (volume_db, seed, loop_samples, crossfade_samples, sample_rate)
+    def build():
+        with span("noise loop", samples=loop_samples):
+            noise = filter_samples("noise", render_noise(loop_samples + crossfade_samples, volume_db, seed), sample_rate) * db_to_gain(-10)
+            # Blend what follows the loop end into its start, so wrapping around continues the same texture
+            angle = np.linspace(0, np.pi / 2, crossfade_samples, dtype=np.float32)
+            loop = noise[:loop_samples].copy()
+            loop[:crossfade_samples] = np.sin(angle) * noise[:crossfade_samples] + np.cos(angle) * noise[loop_samples:]
+            return loop
+
+    return noise_cache.get_or_create(key, build)
+
+def noise_window(loop, start, sample_count):
+    out = np.empty(sample_count, dtype=np.float32)
+    filled = 0
+    while filled < sample_count:
+        position = (start + filled) % len(loop)
+        count = min(len(loop) - position, sample_count - filled)
+        out[filled:filled + count] = loop[position:position + count]
+        filled += count
+    return out
+
+def render_atmospheric_noise(duration_ms, volume_db=-30, seed=0):
+    sample_count = samples_for(duration_ms)
+    if NOISE_LOOP_SAMPLES:
+        return noise_window(render_noise_loop(volume_db, seed), 0, sample_count)
+    return render_noise_block(sample_count, volume_db, rng_seed=seed)
 
 def generate_atmospheric_noise(duration_ms, volume_db=-30):
-    return generate_white_noise(duration_ms, volume_db).low_pass_filter(500).apply_gain(-10)
+    return to_audio_segment(render_atmospheric_noise(duration_ms, volume_db))
 
-def generate_drum_beat(duration_ms, bpm, time_signature, volume_db=-10):
+# One-shot sources, called with (beat_duration_ms, volume_db, sample_rate); each is run through its instrument filter
+DRUM_HITS = {
+    "kick": lambda beat_ms, vol, sr: render_partials(100, samples_for(beat_ms // 2, sr), vol, sr),
+    "snare": lambda beat_ms, vol, sr: render_noise(samples_for(beat_ms // 2, sr), vol, seed=1),
+    "hi_hat": lambda beat_ms, vol, sr: render_noise(samples_for(beat_ms // 4, sr), vol, seed=2),
+    "tom": lambda beat_ms, vol, sr: render_partials(150, samples_for(beat_ms // 2, sr), vol, sr),
+    "crash": lambda beat_ms, vol, sr: render_noise(samples_for(beat_ms, sr), vol, seed=3),
+}
+
+def build_drum_kit(bpm, volume_db=-10, sample_rate=SAMPLE_RATE):
+    beat_duration_ms = 60000 // bpm
+    return {
+        name: drum_hit_cache.get_or_create((name, bpm, volume_db, sample_rate),
+                                           lambda name=name, build=build: filter_samples(name, build(beat_duration_ms, volume_db, sample_rate), sample_rate))
+        for name, build in DRUM_HITS.items()
+    }
+
+def schedule_drum_hits(duration_ms, bpm, time_signature, rng=random, sample_rate=SAMPLE_RATE):
     beat_duration_ms = 60000 // bpm
     beats_per_measure = int(time_signature.split('/')[0])
-    drum = AudioSegment.silent(duration=duration_ms)
-    
-    kick = generate_sine_wave(100, beat_duration_ms // 2, volume_db).low_pass_filter(60)
-    snare = generate_white_noise(beat_duration_ms // 2, volume_db).high_pass_filter(1000)
-    hi_hat = generate_white_noise(beat_duration_ms // 4, volume_db).high_pass_filter(5000)
-    tom = generate_sine_wave(150, beat_duration_ms // 2, volume_db).low_pass_filter(200)
-    crash = generate_white_noise(beat_duration_ms, volume_db).high_pass_filter(2000)
-    
+    hits = []
+
     for beat in range(0, duration_ms, beat_duration_ms):
         measure_position = (beat // beat_duration_ms) % beats_per_measure
-        
+        offset = samples_for(beat, sample_rate)
+
         # Create variations in the drum pattern
         if measure_position == 0:
-            drum = drum.overlay(kick, position=beat)
+            hits.append((offset, "kick"))
         elif measure_position == beats_per_measure - 1:
-            drum = drum.overlay(kick, position=beat).overlay(crash, position=beat)
+            hits.append((offset, "kick"))
+            hits.append((offset, "crash"))
         elif measure_position % 2 == 0:
-            drum = drum.overlay(snare, position=beat)
-        
+            hits.append((offset, "snare"))
+
         # Add hi-hats and toms for more rhythm
         if measure_position % 4 == 0:
-            drum = drum.overlay(hi_hat, position=beat)
+            hits.append((offset, "hi_hat"))
         if measure_position == beats_per_measure // 2:
-            drum = drum.overlay(tom, position=beat)
-        
+            hits.append((offset, "tom"))
+
         # Randomly add variations
-        if random.random() > 0.7:
-            drum = drum.overlay(hi_hat, position=beat)
-        if random.random() > 0.8:
-            drum = drum.overlay(tom, position=beat)
+        if rng.random() > 0.7:
+            hits.append((offset, "hi_hat"))
+        if rng.random() > 0.8:
+            hits.append((offset, "tom"))
+
+    return hits
+
+def render_drum_beat(duration_ms, bpm, time_signature, volume_db=-10, rng=random, sample_rate=SAMPLE_RATE):
+    kit = build_drum_kit(bpm, volume_db, sample_rate)
+    drum = np.zeros(samples_for(duration_ms, sample_rate), dtype=np.float32)
+
+    # Mix each hit into the section buffer only where it lands
+    for offset, name in schedule_drum_hits(duration_ms, bpm, time_signature, rng, sample_rate):
+        hit = kit[name][:len(drum) - offset]
+        drum[offset:offset + len(hit)] += hit
 
     return drum
 
+def generate_drum_beat(duration_ms, bpm, time_signature, volume_db=-10):
+    return to_audio_segment(render_drum_beat(duration_ms, bpm, time_signature, volume_db))
+
 def apply_reverb(audio_segment, decay=0.5):
-    return audio_segment.overlay(audio_segment - decay)
+    return to_audio_segment(Reverb(decay).process(from_audio_segment(audio_segment)))
 
 def apply_echo(audio_segment, delay_ms=300, decay=0.5):
-    echo = audio_segment[:delay_ms].overlay(audio_segment, gain_during_overlay=-decay)
-    return audio_segment.overlay(echo)
-def generate_music(chords, duration_entry, bpm_entry, time_signature_entry, volume_entry, reverb_entry, echo_delay_entry, echo_decay_entry, loop_entry, chords_var, drums_var, noise_var, measures_entry, status_label):
-    try:
-        base_freqs = [CHORD_FREQUENCIES[chord[0]] * (2 ** (chord[12] - 4)) for chord in chords]
-        chord_intervals = [CHORD_TYPES[chord[1]] for chord in chords]
-        is_arpeggio = [chord[2] for chord in chords]
-        has_drums = [chord[3] for chord in chords]
-        has_chords = [chord[4] for chord in chords]
-        durations = [chord[5] for chord in chords]
-        bpms = [chord[6] for chord in chords]
-        time_signatures = [chord[7] for chord in chords]
-        volumes = [chord[8] for chord in chords]
-        reverb_decays = [chord[9] for chord in chords]
-        echo_delays = [chord[10] for chord in chords]
-        echo_decays = [chord[11] for chord in chords]
-
-        try:
-            duration_ms = sum(durations) * 1000
-        except Exception as e:
-            status_label.config(text=f"Error calculating duration: {str(e)}")
-            return
-
-        try:
-            loops = int(loop_entry.get())
-        except ValueError:
-            loops = 1  # Default to 1 loop if invalid or empty
-
-        music = AudioSegment.silent(duration=0)
-        full_drum_track = AudioSegment.silent(duration=0)
-
-        # Generate music and drum sections separately
-        for base_freq, intervals, arpeggio, drums, chords, dur, bpm, ts, vol, rvb, edly, edcy in zip(
-                base_freqs, chord_intervals, is_arpeggio, has_drums, has_chords, durations, bpms, time_signatures, volumes, reverb_decays, echo_delays, echo_decays):
-
-            duration_ms_per_chord = dur * 1000
-
-            if arpeggio:
-                section = generate_arpeggio(base_freq, intervals, duration_ms_per_chord, vol)
-            else:
-                section = generate_chord(base_freq, intervals, duration_ms_per_chord, vol)
+    return to_audio_segment(Echo(delay_ms, decay).process(from_audio_segment(audio_segment)))
+
+OUTPUT_PATH = "generated_dungeon_jazz.wav"
+
+class RenderCancelled(Exception):
+    pass
+
+# Per-section stems from the most recent render, keyed by section_key
+last_render = {"stems": {}, "rendered": 0}
+
+def section_key(chord, include_chords=True, seed=0):
+    # Only the fields that change a section's samples; reverb and echo are applied to the whole mix
+    fields = (chord.name, chord.type, chord.octave, chord.arpeggio, bool(include_chords and chord.include_chords), chord.duration,
+              chord.volume_db, chord.include_drums, chord.bpm, chord.time_signature, seed)
+    return hashlib.sha1(repr(fields).encode("utf-8")).hexdigest()
+
+def synthesize_section(chord, include_chords, key, sample_rate=SAMPLE_RATE):
+    duration_ms = chord.duration * 1000
+    section = np.zeros(samples_for(duration_ms, sample_rate), dtype=np.float32)
+
+    with span("section", "section", chord=chord.label, key=key[:12], nbytes=section.nbytes):
+        if include_chords and chord.include_chords:
+            with span("chord", "section"):
+                render = render_arpeggio if chord.arpeggio else render_chord
+                tones = render(chord.frequency, chord.intervals, duration_ms, chord.volume_db, sample_rate)
+                section[:len(tones)] += tones
+
+        if chord.include_drums:
+            with span("drums", "section"):
+                # Seed the random fills from the section key so a cached section and a fresh one sound the same
+                rng = random.Random(int(key[:16], 16))
+                section += render_drum_beat(duration_ms, chord.bpm, chord.time_signature, chord.volume_db, rng, sample_rate)
 
-            if chords_var.get() and chords:
-                music += section
+    return section
+
+def check_cancelled(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise RenderCancelled()
+
+def render_sections(chords, include_chords=True, seed=0, progress=None, cancel_event=None, workers=None):
+    progression = as_progression(chords)
+    keys = [section_key(chord, include_chords, seed) for chord in progression]
+    previous = last_render["stems"]
+    stems = {}
+    missing = {}
+
+    for key, chord in zip(keys, progression):
+        if key in stems or key in missing:
+            continue
+        if key in previous:
+            stems[key] = previous[key]
+        elif key in section_cache:
+            stems[key] = section_cache.get(key)
+        else:
+            missing[key] = chord
+
+    def section_done(index):
+        check_cancelled(cancel_event)
+        if progress:
+            progress(index + 1, len(missing))
+
+    with span("sections", sections=len(progression), rendered=len(missing), workers=workers or 1):
+        if workers and workers > 1 and len(missing) > 1:
+            from parallel_render import render_parallel
+
+            # Drum fills are seeded from each section key, so pool renders match serial ones
+            jobs = [((chord, include_chords, key), samples_for(chord.duration * 1000)) for key, chord in missing.items()]
+            for key, section in zip(missing, render_parallel(synthesize_section, jobs, workers, section_done)):
+                stems[key] = section_cache.put(key, section)
+        else:
+            for index, (key, chord) in enumerate(missing.items()):
+                check_cancelled(cancel_event)
+                stems[key] = section_cache.put(key, synthesize_section(chord, include_chords, key))
+                section_done(index)
+
+    # Pin this render's stems so the next edit only re-synthesizes what changed, even after cache eviction
+    last_render["stems"] = stems
+    last_render["rendered"] = len(missing)
+    return [stems[key] for key in keys]
+
+def render_noise_block(sample_count, volume_db=-30, noise_filter=None, rng_seed=None, sample_rate=SAMPLE_RATE):
+    # Pass the same filter for consecutive blocks so its state carries across block boundaries
+    noise_filter = noise_filter or instrument_filter("noise", sample_rate)
+    return noise_filter.process(render_noise(sample_count, volume_db, rng_seed)) * db_to_gain(-10)
+
+def mix_blocks(sections, progression, include_noise=True, block_samples=STREAM_BLOCK_SAMPLES, cancel_event=None, effects=None, sample_rate=SAMPLE_RATE):
+    effects = effects if effects is not None else effect_chain(progression, sample_rate)
+    noise_volume = int(progression.volumes[0])
+    noise_loop = render_noise_loop(noise_volume, sample_rate=sample_rate) if include_noise and NOISE_LOOP_SAMPLES else None
+    noise_filter = instrument_filter("noise", sample_rate)
+    noise_rng = np.random.default_rng(0)
+    position = 0
+    for block in iter_blocks(sections, block_samples):
+        check_cancelled(cancel_event)
+        if include_noise:
+            with span("noise", "block", samples=len(block)):
+                if noise_loop is not None:
+                    block += noise_window(noise_loop, position, len(block))
+                else:
+                    block += render_noise_block(len(block), noise_volume, noise_filter, noise_rng, sample_rate)
+        position += len(block)
+        with span("effects", "block", samples=len(block)):
+            block = apply_effects(block, effects)
+        yield block
+
+def iter_sections(progression, include_chords=True, seed=0, progress=None, cancel_event=None, sample_rate=SAMPLE_RATE, workers=None, record=None):
+    # Renders sections only when the block stream reaches them, at most `workers` at a time.
+    # New sections go to the byte-bounded section_cache, so a long export holds at most the cache plus the current window.
+    # With record (last_render), this render's stems are pinned there for the next edit, and the re-render count is kept;
+    # a preview playing in the background passes none, so it can't overwrite an export's.
+    previous = last_render["stems"] if sample_rate == SAMPLE_RATE else {}
+    budget = section_cache.max_bytes
+    window = workers if workers and workers > 1 else 1
+    stems = {}
+    pinned_bytes = 0
+    rendered = 0
+
+    for begin in range(0, len(progression), window):
+        check_cancelled(cancel_event)
+        chords = [progression[index] for index in range(begin, min(begin + window, len(progression)))]
+        keys = [section_key(chord, include_chords, seed) for chord in chords]
+        # Drum fills stay seeded from the rate-independent key, so draft sections play the same pattern
+        cache_keys = {key: key if sample_rate == SAMPLE_RATE else f"{key}@{sample_rate}" for key in keys}
+        sections = {}
+        missing = {}
+        for key, chord in zip(keys, chords):
+            if key in sections or key in missing:
+                continue
+            # A chord repeated later in the song reuses the stem from its first appearance
+            if key in stems:
+                sections[key] = stems[key]
+            elif key in previous:
+                sections[key] = previous[key]
+            elif cache_keys[key] in section_cache:
+                sections[key] = section_cache.get(cache_keys[key])
             else:
-                music += AudioSegment.silent(duration=duration_ms_per_chord)
+                missing[key] = chord
+
+        if len(missing) > 1:
+            from parallel_render import render_parallel
+
+            jobs = [((chord, include_chords, key, sample_rate), samples_for(chord.duration * 1000, sample_rate)) for key, chord in missing.items()]
+            fresh = render_parallel(synthesize_section, jobs, window)
+        else:
+            fresh = [synthesize_section(chord, include_chords, key, sample_rate) for key, chord in missing.items()]
+        for key, section in zip(missing, fresh):
+            sections[key] = section_cache.put(cache_keys[key], section)
+        rendered += len(missing)
+
+        # Stems are pinned up to the cache's byte limit, so pinning never more than doubles its footprint
+        for key, section in sections.items():
+            if key not in stems and (budget is None or pinned_bytes + section.nbytes <= budget):
+                stems[key] = section
+                pinned_bytes += section.nbytes
+
+        for index, key in enumerate(keys, begin):
+            yield sections[key]
+            if progress:
+                progress(index + 1, len(progression))
 
-            drum_section = generate_drum_beat(duration_ms_per_chord, bpm, ts, vol) if drums else AudioSegment.silent(duration=duration_ms_per_chord)
-            full_drum_track += drum_section
+    if record is not None:
+        record["stems"] = stems
+        record["rendered"] = rendered
 
-        if noise_var.get():
-            atmospheric_noise = generate_atmospheric_noise(len(music), volumes[0])  # Use the first volume value for noise
-            music = music.overlay(atmospheric_noise)
+def render_loop(chords, include_chords=True, include_noise=True, seed=0, progress=None, cancel_event=None, workers=None, impulse=DEFAULT_IMPULSE):
+    progression = as_progression(chords)
+    sections = render_sections(progression, include_chords, seed, progress, cancel_event, workers)
+    effects = effect_chain(progression, impulse=impulse)
+    loop = np.zeros(progression.offsets(SAMPLE_RATE)[-1], dtype=np.float32)
 
-        music = music.overlay(full_drum_track)
-        music = apply_reverb(music, decay=reverb_decays[0])
-        music = apply_echo(music, delay_ms=echo_delays[0], decay=echo_decays[0])
+    offset = 0
+    for block in mix_blocks(sections, progression, include_noise, STREAM_BLOCK_SAMPLES, cancel_event, effects):
+        loop[offset:offset + len(block)] = block
+        offset += len(block)
 
-        music = music * loops
-        music.export("generated_dungeon_jazz.wav", format="wav")
+    with span("loop fold", nbytes=loop.nbytes):
+        # Fold the effect tail back onto the start so the seam sounds like the loop kept playing
+        tail = flush_effects(effects)
+        for start in range(0, len(tail), max(len(loop), 1)):
+            chunk = tail[start:start + len(loop)]
+            loop[:len(chunk)] += chunk
 
-        status_label.config(text="Music generated and saved as 'generated_dungeon_jazz.wav'")
+    return loop
+
+def stream_music(chords, include_chords=True, include_noise=True, loops=1, seed=0, block_samples=STREAM_BLOCK_SAMPLES, progress=None, cancel_event=None, workers=None, impulse=DEFAULT_IMPULSE):
+    progression = as_progression(chords)
+    if loops > 1:
+        # One pass is rendered once and repeated, so render cost doesn't grow with the loop count
+        loop = render_loop(progression, include_chords, include_noise, seed, progress, cancel_event, workers, impulse)
+        for _ in range(loops):
+            yield from (block.copy() for block in iter_blocks([loop], block_samples))
+        return
+
+    # Sections are rendered as the stream reaches them; peak memory is bounded by the section cache, not the song length
+    sections = iter_sections(progression, include_chords, seed, progress, cancel_event, workers=workers, record=last_render)
+    yield from mix_blocks(sections, progression, include_noise, block_samples, cancel_event, effect_chain(progression, impulse=impulse))
+
+def stream_preview(chords, include_chords=True, include_noise=True, seed=0, block_samples=STREAM_BLOCK_SAMPLES, progress=None, cancel_event=None, quality="full", impulse=DEFAULT_IMPULSE):
+    # Yields blocks at RENDER_QUALITY[quality]["sample_rate"]
+    settings = RENDER_QUALITY[quality]
+    sample_rate = settings["sample_rate"]
+    progression = as_progression(chords)
+    sections = iter_sections(progression, include_chords, seed, progress, cancel_event, sample_rate)
+    effects = effect_chain(progression, sample_rate, settings["effects"], impulse)
+    yield from mix_blocks(sections, progression, include_noise and settings["noise"], block_samples * sample_rate // SAMPLE_RATE,
+                          cancel_event, effects, sample_rate)
+
+# Chord auditions loop one bar, capped so slow tempos and long measures still start instantly
+AUDITION_MAX_MS = 4000
+
+def audition_ms(chord):
+    beats_per_measure = int(chord.time_signature.split('/')[0])
+    return min(beats_per_measure * (60000 // chord.bpm), AUDITION_MAX_MS, chord.duration * 1000)
+
+def render_audition(chord, quality="draft"):
+    # One bar of the chord's tones and drums at RENDER_QUALITY[quality]["sample_rate"], meant to be looped
+    sample_rate = RENDER_QUALITY[quality]["sample_rate"]
+    key = section_key(chord)
+    window_ms = audition_ms(chord)
+    def build():
+        audition = np.zeros(samples_for(window_ms, sample_rate), dtype=np.float32)
+        render = render_arpeggio if chord.arpeggio else render_chord
+        tones = render(chord.frequency, chord.intervals, window_ms, chord.volume_db, sample_rate)
+        audition[:len(tones)] += tones
+        if chord.include_drums:
+            # Same seed as the full section, so the bar matches its opening
+            audition += render_drum_beat(window_ms, chord.bpm, chord.time_signature, chord.volume_db, random.Random(int(key[:16], 16)), sample_rate)
+        return audition
+
+    return section_cache.get_or_create(f"{key}@audition@{sample_rate}", build)
+
+def export_music(chords, include_chords=True, include_noise=True, loops=1, path=OUTPUT_PATH, progress=None, cancel_event=None, workers=None, memmap=False, impulse=DEFAULT_IMPULSE):
+    chords = as_progression(chords)
+    if memmap and not path.lower().endswith(".wav"):
+        raise ValueError("Memory-mapped output is only available for WAV files")
+    if memmap:
+        # Blocks are converted straight into the preallocated file; the page cache holds what RAM can't
+        frame_count = int(chords.offsets(SAMPLE_RATE)[-1])
+        if loops > 1:
+            blocks = [render_loop(chords, include_chords, include_noise, progress=progress, cancel_event=cancel_event, workers=workers, impulse=impulse)]
+        else:
+            blocks = stream_music(chords, include_chords, include_noise, progress=progress, cancel_event=cancel_event, workers=workers, impulse=impulse)
+        write_wav_memmap(blocks, path, frame_count, max(loops, 1))
+    elif loops > 1:
+        write_wav_loop(render_loop(chords, include_chords, include_noise, progress=progress, cancel_event=cancel_event, workers=workers, impulse=impulse), path, loops)
+    else:
+        write_wav(stream_music(chords, include_chords, include_noise, progress=progress, cancel_event=cancel_event, workers=workers, impulse=impulse), path)
+    return f"Music generated and saved as '{path}' ({last_render['rendered']} of {len(chords)} sections re-rendered)"
+
+def export_settings(settings, path=OUTPUT_PATH, progress=None, cancel_event=None, workers=None, memmap=False):
+    # settings is shaped like settings.json, so headless renders need no widgets
+    try:
+        loops = int(settings.get("loops", 1))
+    except (TypeError, ValueError):
+        loops = 1  # Default to 1 loop if invalid or empty
+
+    progression = Progression.from_json(settings["chords"])
+    return export_music(progression, settings.get("include_chords", True), settings.get("include_noise", True), loops,
+                        path, progress, cancel_event, workers, memmap, settings.get("reverb_impulse") or DEFAULT_IMPULSE)
+
+def generate_music(chords, duration_entry, bpm_entry, time_signature_entry, volume_entry, reverb_entry, echo_delay_entry, echo_decay_entry, loop_entry, chords_var, drums_var, noise_var, measures_entry, status_label):
+    try:
+        settings = {"chords": Progression(chords).to_json(), "loops": loop_entry.get(), "include_chords": chords_var.get(), "include_noise": noise_var.get()}
+        status_label.config(text=export_settings(settings))
     except Exception as e:
         status_label.config(text=f"Error generating music: {str(e)}")
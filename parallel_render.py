@@ -0,0 +1,52 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+
+_executor = None
+_executor_workers = None
+
+def get_executor(workers):
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = ProcessPoolExecutor(max_workers=workers)
+        _executor_workers = workers
+    return _executor
+
+def _render_into(synthesize, args, shm_name, offset, sample_count):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        view = np.ndarray((sample_count,), dtype=np.float32, buffer=shm.buf, offset=offset * 4)
+        section = synthesize(*args)
+        view[:len(section)] = section[:sample_count]
+        del view
+    finally:
+        shm.close()
+
+def render_parallel(synthesize, jobs, workers, on_done=None):
+    # jobs is a list of (args, sample_count); synthesize(*args) must be a picklable module-level function
+    offsets = np.concatenate([[0], np.cumsum([count for _, count in jobs])]).astype(int)
+    shm = shared_memory.SharedMemory(create=True, size=max(int(offsets[-1]) * 4, 1))
+    try:
+        executor = get_executor(workers)
+        futures = [executor.submit(_render_into, synthesize, args, shm.name, int(offset), count)
+                   for (args, count), offset in zip(jobs, offsets)]
+        try:
+            for index, future in enumerate(futures):
+                future.result()
+                if on_done:
+                    on_done(index)
+        except BaseException:
+            for pending in futures:
+                pending.cancel()
+            raise
+
+        # Sections come back as slices of one shared buffer; copy them out before it is unlinked
+        buffer = np.ndarray((int(offsets[-1]),), dtype=np.float32, buffer=shm.buf)
+        sections = [buffer[start:end].copy() for start, end in zip(offsets[:-1], offsets[1:])]
+        del buffer
+        return sections
+    finally:
+        shm.close()
+        shm.unlink()
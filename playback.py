@@ -0,0 +1,141 @@
+from collections import deque
+import contextvars
+import threading
+import time
+import numpy as np
+import pygame
+from music_generation import RenderCancelled, check_cancelled
+from synthesis import MAX_AMPLITUDE, SAMPLE_RATE, to_pcm16
+
+# Blocks rendered ahead of the playhead while the channel is busy
+LOOKAHEAD_BLOCKS = 8
+
+def ensure_mixer():
+    # The audio device is opened on first playback, not at startup
+    if not pygame.mixer.get_init():
+        pygame.mixer.init()
+    return pygame
+
+def mixer_pcm(samples, sample_rate=SAMPLE_RATE):
+    # Float or int16 samples, one column per channel (or 1-D mono), in the mixer's rate and channel layout.
+    # int16 that already matches is returned as is; anything else is converted in a single pass.
+    frequency, _, channels = ensure_mixer().mixer.get_init()
+    samples = samples.reshape(len(samples), -1)
+    if frequency == sample_rate and samples.dtype == np.int16 and samples.shape[1] == channels and samples.flags["C_CONTIGUOUS"]:
+        return samples
+    # Extra output channels repeat the first source channel
+    source = samples if samples.shape[1] == channels else samples[:, :1]
+    if frequency == sample_rate:
+        pcm = np.empty((len(samples), channels), dtype=np.int16)
+        if samples.dtype == np.int16:
+            pcm[:] = source
+        else:
+            to_pcm16(source, out=pcm)
+        return pcm
+
+    # Resampled values are float whatever the input, so int16 is brought back to [-1, 1] in the same pass
+    positions = np.arange(0, len(samples), sample_rate / frequency)
+    resampled = np.empty((len(positions), source.shape[1]))
+    scale = 1 / MAX_AMPLITUDE if samples.dtype == np.int16 else 1
+    for column in range(source.shape[1]):
+        np.multiply(np.interp(positions, np.arange(len(samples)), source[:, column]), scale, out=resampled[:, column])
+    pcm = np.empty((len(positions), channels), dtype=np.int16)
+    to_pcm16(resampled, out=pcm)
+    return pcm
+
+def make_sound(samples, sample_rate=SAMPLE_RATE):
+    # The mixer copies the buffer once into its own chunk
+    return pygame.mixer.Sound(buffer=mixer_pcm(samples, sample_rate))
+
+def audio_view(audio):
+    # Renderer float arrays are used as they are; an AudioSegment's raw bytes are viewed as int16 frames without copying
+    if hasattr(audio, "raw_data"):
+        if audio.sample_width != 2:
+            raise ValueError("Only 16-bit audio can be played")
+        return np.frombuffer(audio.raw_data, dtype=np.int16).reshape(-1, audio.channels), audio.frame_rate
+    return np.asarray(audio), SAMPLE_RATE
+
+def play_audio(audio, sample_rate=None, start=0, stop=None, loops=0):
+    # start and stop are sample indices; the sub-range is a view of the buffer, so mixer_pcm's conversion is the only copy
+    samples, native_rate = audio_view(audio)
+    return make_sound(samples[start:stop], sample_rate or native_rate).play(loops=loops)
+
+def loop_sound(samples, sample_rate=SAMPLE_RATE, start=0, stop=None):
+    # Repeats until the returned channel is stopped
+    return play_audio(samples, sample_rate, start, stop, loops=-1)
+
+class StreamPlayer:
+    # Feeds rendered blocks to a mixer channel from its own thread, so nothing else waits out the song
+    def __init__(self, blocks, cancel_event=None, lookahead=LOOKAHEAD_BLOCKS, sample_rate=SAMPLE_RATE, on_error=None):
+        self.cancel_event = cancel_event or threading.Event()
+        self.channel = None
+        self.error = None
+        self.on_error = on_error
+        self.started = threading.Event()
+        self._finished = False
+        self._done_callbacks = []
+        self._lock = threading.Lock()
+        # Runs in a copy of the caller's context, so an active trace keeps recording the rest of the render
+        context = contextvars.copy_context()
+        self._thread = threading.Thread(target=context.run, args=(self._run, iter(blocks), lookahead, sample_rate), daemon=True)
+        self._thread.start()
+
+    def _run(self, blocks, lookahead, sample_rate):
+        pending = deque()
+        exhausted = False
+        try:
+            while not exhausted or pending:
+                check_cancelled(self.cancel_event)
+                if self.channel is None and pending:
+                    # First block starts playing as soon as it exists
+                    self.channel = pygame.mixer.find_channel(True)
+                    self.channel.play(pending.popleft())
+                    self.started.set()
+                elif self.channel is not None and pending and self.channel.get_queue() is None:
+                    self.channel.queue(pending.popleft())
+                elif not exhausted and len(pending) < lookahead:
+                    try:
+                        pending.append(make_sound(next(blocks), sample_rate))
+                    except StopIteration:
+                        exhausted = True
+                else:
+                    time.sleep(0.01)
+        except BaseException as e:
+            # A cancelled or failed render should not leave half a song playing
+            if self.channel is not None:
+                self.channel.stop()
+            if not isinstance(e, RenderCancelled):
+                self.error = e
+                if self.started.is_set() and self.on_error is not None:
+                    self.on_error(e)
+        finally:
+            self.started.set()
+            with self._lock:
+                self._finished = True
+                callbacks, self._done_callbacks = self._done_callbacks, []
+            for callback in callbacks:
+                callback()
+
+    def add_done_callback(self, callback):
+        # callback() runs on the player thread once every block has been rendered and queued, or playback stopped
+        with self._lock:
+            if not self._finished:
+                self._done_callbacks.append(callback)
+                return
+        callback()
+
+    def wait_started(self):
+        self.started.wait()
+        check_cancelled(self.cancel_event)
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def stop(self):
+        self.cancel_event.set()
+        if self.channel is not None:
+            self.channel.stop()
+
+def play_stream(blocks, cancel_event=None, lookahead=LOOKAHEAD_BLOCKS, sample_rate=SAMPLE_RATE, on_error=None):
+    # Returns the player once the first block is playing; the rest of the song is queued in the background
+    return StreamPlayer(blocks, cancel_event, lookahead, sample_rate, on_error).wait_started()
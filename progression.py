@@ -0,0 +1,143 @@
+import numpy as np
+from chord_management import CHORD_FREQUENCIES, CHORD_TYPES
+from wavetable import note_frequency
+
+# Bumped whenever the serialized column layout changes
+PROGRESSION_SCHEMA = 1
+
+# Field order matches the legacy 13-element chord tuples, so old settings files load unchanged
+FIELDS = ("name", "type", "arpeggio", "include_drums", "include_chords", "duration", "bpm", "time_signature",
+          "volume_db", "reverb_decay", "echo_delay_ms", "echo_decay", "octave")
+
+PROGRESSION_DTYPE = np.dtype([
+    ("name", "U2"),
+    ("type", "U24"),
+    ("arpeggio", "?"),
+    ("include_drums", "?"),
+    ("include_chords", "?"),
+    ("duration", "i4"),
+    ("bpm", "i4"),
+    ("time_signature", "U8"),
+    ("volume_db", "i4"),
+    ("reverb_decay", "f8"),
+    ("echo_delay_ms", "i4"),
+    ("echo_decay", "f8"),
+    ("octave", "i1"),
+])
+
+class Chord:
+    __slots__ = FIELDS
+
+    def __init__(self, name="C", type="Major", arpeggio=False, include_drums=True, include_chords=True, duration=60, bpm=120,
+                 time_signature="4/4", volume_db=-10, reverb_decay=0.5, echo_delay_ms=300, echo_decay=0.5, octave=4):
+        self.name = name
+        self.type = type
+        self.arpeggio = arpeggio
+        self.include_drums = include_drums
+        self.include_chords = include_chords
+        self.duration = duration
+        self.bpm = bpm
+        self.time_signature = time_signature
+        self.volume_db = volume_db
+        self.reverb_decay = reverb_decay
+        self.echo_delay_ms = echo_delay_ms
+        self.echo_decay = echo_decay
+        self.octave = octave
+
+    @classmethod
+    def from_sequence(cls, values):
+        return cls(*values)
+
+    def astuple(self):
+        return tuple(getattr(self, field) for field in FIELDS)
+
+    def __iter__(self):
+        return iter(self.astuple())
+
+    def __eq__(self, other):
+        return isinstance(other, Chord) and self.astuple() == other.astuple()
+
+    def __repr__(self):
+        return "Chord(" + ", ".join(f"{field}={getattr(self, field)!r}" for field in FIELDS) + ")"
+
+    @property
+    def frequency(self):
+        return float(note_frequency(self.name, self.octave))
+
+    @property
+    def intervals(self):
+        return CHORD_TYPES[self.type]
+
+    @property
+    def label(self):
+        arpeggio_text = " (Arpeggio)" if self.arpeggio else ""
+        drum_text = " (Drums)" if self.include_drums else ""
+        chord_text = " (Chords)" if self.include_chords else ""
+        return f"{self.name}{self.octave} {self.type}{arpeggio_text}{drum_text}{chord_text}"
+
+def validate_chord(chord):
+    if chord.name not in CHORD_FREQUENCIES:
+        raise ValueError(f"Unknown chord name {chord.name!r}")
+    if chord.type not in CHORD_TYPES:
+        raise ValueError(f"Unknown chord type {chord.type!r}")
+    if not 0 <= int(chord.octave) <= 8:
+        raise ValueError(f"Octave {chord.octave!r} is outside 0-8")
+    if float(chord.duration) <= 0:
+        raise ValueError(f"Duration must be positive, got {chord.duration!r}")
+    # The duration column holds whole seconds; a fractional value would otherwise be truncated silently
+    if float(chord.duration) != int(float(chord.duration)):
+        raise ValueError(f"Duration must be a whole number of seconds, got {chord.duration!r}")
+    if int(chord.bpm) <= 0:
+        raise ValueError(f"BPM must be positive, got {chord.bpm!r}")
+    beats, _, unit = str(chord.time_signature).partition("/")
+    if not (beats.isdigit() and unit.isdigit() and int(beats) > 0):
+        raise ValueError(f"Invalid time signature {chord.time_signature!r}")
+
+class Progression:
+    def __init__(self, chords=()):
+        records = [chord if isinstance(chord, Chord) else Chord.from_sequence(chord) for chord in chords]
+        # Validate once here; render code can then trust every column
+        for chord in records:
+            validate_chord(chord)
+        self.data = np.array([chord.astuple() for chord in records], dtype=PROGRESSION_DTYPE)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        row = self.data[index]
+        return Chord(*(row[field].item() for field in FIELDS))
+
+    def __iter__(self):
+        for index in range(len(self.data)):
+            yield self[index]
+
+    @property
+    def durations(self):
+        return self.data["duration"]
+
+    @property
+    def volumes(self):
+        return self.data["volume_db"]
+
+    def sample_counts(self, sample_rate):
+        return (sample_rate * self.durations).astype(np.int64)
+
+    def offsets(self, sample_rate):
+        return np.concatenate([[0], np.cumsum(self.sample_counts(sample_rate))])
+
+    def to_json(self):
+        return {"schema": PROGRESSION_SCHEMA, "columns": {field: self.data[field].tolist() for field in FIELDS}}
+
+    @classmethod
+    def from_json(cls, value):
+        # Older settings files store a list of 13-element chord arrays
+        if isinstance(value, list):
+            return cls(value)
+        if value.get("schema", 0) > PROGRESSION_SCHEMA:
+            raise ValueError(f"Progression schema {value['schema']} is newer than supported ({PROGRESSION_SCHEMA})")
+        columns = value["columns"]
+        return cls(zip(*(columns[field] for field in FIELDS)))
+
+def as_progression(chords):
+    return chords if isinstance(chords, Progression) else Progression(chords)
@@ -0,0 +1,91 @@
+from collections import OrderedDict
+import threading
+
+class LRUCache:
+    def __init__(self, maxsize=128, max_bytes=None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= _sizeof(self._entries.pop(key))
+            # Cached buffers are shared between renders, so they must never be mixed into in place
+            if hasattr(value, "setflags"):
+                value.setflags(write=False)
+            self._entries[key] = value
+            self.nbytes += _sizeof(value)
+            self._evict()
+        return value
+
+    def get_or_create(self, key, factory):
+        with self._lock:
+            value = self.get(key, _MISSING)
+            if value is _MISSING:
+                value = self.put(key, factory())
+            return value
+
+    def resize(self, maxsize=None, max_bytes=None):
+        with self._lock:
+            self.maxsize = maxsize
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "nbytes": self.nbytes}
+
+    def _evict(self):
+        while self._entries and ((self.maxsize is not None and len(self._entries) > self.maxsize) or
+                                 (self.max_bytes is not None and self.nbytes > self.max_bytes)):
+            _, value = self._entries.popitem(last=False)
+            self.nbytes -= _sizeof(value)
+
+_MISSING = object()
+
+def _sizeof(value):
+    return getattr(value, "nbytes", 0)
+
+# One-shot drum hits, keyed by (instrument, bpm, volume_db, sample_rate)
+drum_hit_cache = LRUCache(maxsize=64)
+
+# Seamless loops of low-passed atmospheric noise, keyed by (volume_db, seed, loop_samples, crossfade_samples, sample_rate)
+noise_cache = LRUCache(maxsize=4, max_bytes=256 * 2 ** 20)
+impulse_cache = LRUCache(maxsize=8)
+wavetable_cache = LRUCache(maxsize=16)
+
+# Rendered chord sections (tones plus drums), keyed by a hash of the section's render-relevant fields
+SECTION_CACHE_MAX_BYTES = 512 * 2 ** 20
+section_cache = LRUCache(maxsize=None, max_bytes=SECTION_CACHE_MAX_BYTES)
+
+def configure_section_cache(max_bytes=SECTION_CACHE_MAX_BYTES, maxsize=None):
+    section_cache.resize(maxsize=maxsize, max_bytes=max_bytes)
+
+def cache_stats():
+    return {"drum_hits": drum_hit_cache.stats(), "noise": noise_cache.stats(), "impulses": impulse_cache.stats(), "sections": section_cache.stats()}
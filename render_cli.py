@@ -0,0 +1,70 @@
+from startup import timed_import, import_report
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from settings_management import read_settings
+
+def render_file(settings_path, output_path, workers=None, trace=False, memmap=False, impulse=None):
+    music_generation = timed_import("music_generation")
+    settings = read_settings(settings_path)
+    if impulse:
+        settings["reverb_impulse"] = impulse
+    if not trace:
+        return music_generation.export_settings(settings, output_path, workers=workers, memmap=memmap)
+
+    tracing = timed_import("tracing")
+    with tracing.trace() as tracer:
+        result = music_generation.export_settings(settings, output_path, workers=workers, memmap=memmap)
+    tracer.write_chrome_trace(os.path.splitext(output_path)[0] + ".trace.json")
+    return f"{result} | {tracer.summary()}"
+
+def output_path_for(settings_path, output_dir, output_format="wav"):
+    name = os.path.splitext(os.path.basename(settings_path))[0] + "." + output_format
+    return os.path.join(output_dir or os.path.dirname(settings_path), name)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render settings.json files to audio without the GUI.")
+    parser.add_argument("settings", nargs="+", help="settings files saved from the GUI")
+    parser.add_argument("-o", "--output-dir", help="directory for the rendered files (default: next to each settings file)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--trace", action="store_true", help="write a Chrome trace next to each output and print a stage summary")
+    parser.add_argument("-f", "--format", choices=["wav", "flac", "ogg", "mp3"], default="wav",
+                        help="output format; compressed formats are encoded by ffmpeg while rendering")
+    parser.add_argument("--memmap", action="store_true", help="render into a preallocated, memory-mapped output file")
+    parser.add_argument("--impulse", help="reverb impulse response: room, hall, dungeon or a path to a 16-bit WAV "
+                                          "(default: the settings file's reverb_impulse, else dungeon)")
+    parser.add_argument("--import-report", action="store_true", help="print module import times when done")
+    args = parser.parse_args(argv)
+
+    outputs = {path: output_path_for(path, args.output_dir, args.format) for path in args.settings}
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    failed = 0
+    if len(outputs) == 1:
+        # A single file spreads its sections over the pool instead
+        (settings_path, output_path), = outputs.items()
+        try:
+            print(render_file(settings_path, output_path, workers=args.jobs, trace=args.trace, memmap=args.memmap, impulse=args.impulse))
+        except Exception as e:
+            print(f"Error rendering '{settings_path}': {str(e)}", file=sys.stderr)
+            failed += 1
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            futures = {executor.submit(render_file, settings_path, output_path, trace=args.trace, memmap=args.memmap, impulse=args.impulse): settings_path
+                       for settings_path, output_path in outputs.items()}
+            for future in as_completed(futures):
+                try:
+                    print(future.result())
+                except Exception as e:
+                    print(f"Error rendering '{futures[future]}': {str(e)}", file=sys.stderr)
+                    failed += 1
+
+    if args.import_report:
+        print(import_report("render"), file=sys.stderr)
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+from contextlib import nullcontext
+import queue
+import threading
+from startup import timed_import
+
+# How often the Tk thread picks up messages from the worker
+POLL_INTERVAL_MS = 50
+
+class RenderWorker:
+    def __init__(self, root, status_label):
+        self.root = root
+        self.status_label = status_label
+        self._current = None
+        self._jobs = queue.Queue()
+        self._messages = queue.Queue()
+        self._busy = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def submit(self, description, job, on_done=None, trace=False):
+        # job(progress, cancel_event) runs on the worker; on_done(result) runs back on the Tk thread.
+        # Returns the job's cancel event, so a caller can cancel this job whether it is queued or running.
+        if self._busy or not self._jobs.empty():
+            self.status_label.config(text=f"{description} queued")
+        cancel_event = threading.Event()
+        self._jobs.put((description, job, on_done, trace, cancel_event))
+        return cancel_event
+
+    def post(self, callback):
+        # Runs callback on the Tk thread; safe to call from any thread
+        self._messages.put(callback)
+
+    def cancel(self):
+        # Stops the running render at the next section boundary; queued renders still run
+        current = self._current
+        if current is not None:
+            current.set()
+
+    def _set_status(self, text):
+        self._messages.put(lambda: self.status_label.config(text=text))
+
+    def _report_trace(self, tracer):
+        tracer.write_chrome_trace()
+        summary = tracer.summary()
+        self._messages.put(lambda: self.status_label.config(text=f"{self.status_label.cget('text')} | {summary}"))
+
+    def _run(self):
+        while True:
+            description, job, on_done, trace, cancel_event = self._jobs.get()
+            # Render modules load with the first job, not while the window is being built, and show up in --import-report
+            music_generation = timed_import("music_generation")
+            tracing = timed_import("tracing")
+            self._busy = True
+            self._current = cancel_event
+
+            def progress(done, total):
+                self._set_status(f"{description}: section {done} of {total}")
+
+            try:
+                with tracing.trace() if trace else nullcontext() as tracer:
+                    result = job(progress, cancel_event)
+                if on_done is not None:
+                    self._messages.put(lambda on_done=on_done, result=result: on_done(result))
+                if tracer is not None:
+                    # A job that keeps rendering in the background (a streaming preview) reports its trace when that finishes
+                    if hasattr(result, "add_done_callback"):
+                        result.add_done_callback(lambda tracer=tracer: self._report_trace(tracer))
+                    else:
+                        self._report_trace(tracer)
+            except music_generation.RenderCancelled:
+                self._set_status(f"{description} cancelled")
+            except Exception as e:
+                self._set_status(f"Error {description.lower()}: {str(e)}")
+            finally:
+                self._current = None
+                self._busy = False
+
+    def _poll(self):
+        try:
+            while True:
+                self._messages.get_nowait()()
+        except queue.Empty:
+            pass
+        self.root.after(POLL_INTERVAL_MS, self._poll)
@@ -1,9 +1,19 @@
 import json
-import tkinter as tk
 
-def save_settings(chords, duration_entry, bpm_entry, time_signature_entry, volume_entry, reverb_entry, echo_delay_entry, echo_decay_entry, loop_entry, chords_var, drums_var, noise_var, status_label):
+SETTINGS_PATH = "settings.json"
+
+def save_settings(chords, duration_entry, bpm_entry, time_signature_entry, volume_entry, reverb_entry, echo_delay_entry, echo_decay_entry, loop_entry, chords_var, drums_var, noise_var, impulse_var, status_label):
+    from progression import Progression
+
+    # Chords are validated on the way into the columnar layout; a bad one is reported rather than saved
+    try:
+        progression = Progression(chords)
+    except ValueError as e:
+        status_label.config(text=f"Cannot save settings: {str(e)}")
+        return
+
     settings = {
-        "chords": chords,
+        "chords": progression.to_json(),
         "duration": duration_entry.get(),
         "bpm": bpm_entry.get(),
         "time_signature": time_signature_entry.get(),
@@ -14,24 +24,30 @@ def save_settings(chords, duration_entry, bpm_entry, time_signature_entry, volum
         "loops": loop_entry.get(),
         "include_chords": chords_var.get(),
         "include_drums": drums_var.get(),
-        "include_noise": noise_var.get()
+        "include_noise": noise_var.get(),
+        "reverb_impulse": impulse_var.get()
     }
-    with open("settings.json", "w") as f:
+    with open(SETTINGS_PATH, "w") as f:
         json.dump(settings, f)
     status_label.config(text="Settings saved to 'settings.json'")
 
-def load_settings(chords, chord_listbox, duration_entry, bpm_entry, time_signature_entry, volume_entry, reverb_entry, echo_delay_entry, echo_decay_entry, loop_entry, chords_var, drums_var, noise_var, status_label):
+def read_settings(path=SETTINGS_PATH):
+    with open(path, "r") as f:
+        return json.load(f)
+
+def load_settings(chords, chord_listbox, duration_entry, bpm_entry, time_signature_entry, volume_entry, reverb_entry, echo_delay_entry, echo_decay_entry, loop_entry, chords_var, drums_var, noise_var, impulse_var, status_label):
+    import tkinter as tk  # Imported here so headless renders can read settings without Tk
+    from impulses import DEFAULT_IMPULSE
+    from progression import Progression
+
     try:
-        with open("settings.json", "r") as f:
-            settings = json.load(f)
+        settings = read_settings()
+        progression = Progression.from_json(settings["chords"])
         chords.clear()
         chord_listbox.delete(0, tk.END)
-        chords.extend(settings["chords"])
+        chords.extend(progression)
         for chord in chords:
-            arpeggio_text = " (Arpeggio)" if chord[2] else ""
-            drum_text = " (Drums)" if chord[3] else ""
-            chord_text = " (Chords)" if chord[4] else ""
-            chord_listbox.insert(tk.END, f"{chord[0]}{chord[12]} {chord[1]}{arpeggio_text}{drum_text}{chord_text}")
+            chord_listbox.insert(tk.END, chord.label)
         duration_entry.delete(0, tk.END)
         duration_entry.insert(0, settings["duration"])
         bpm_entry.delete(0, tk.END)
@@ -51,6 +67,12 @@ def load_settings(chords, chord_listbox, duration_entry, bpm_entry, time_signatu
         chords_var.set(settings["include_chords"])
         drums_var.set(settings["include_drums"])
         noise_var.set(settings["include_noise"])
+        # Settings saved before the impulse could be chosen always used the default
+        impulse_var.set(settings.get("reverb_impulse") or DEFAULT_IMPULSE)
         status_label.config(text="Settings loaded from 'settings.json'")
     except FileNotFoundError:
         status_label.config(text="No settings file found. Please save settings first.")
+    except ValueError as e:
+        status_label.config(text=f"Invalid settings file: {str(e)}")
+    except KeyError as e:
+        status_label.config(text=f"Invalid settings file: missing {str(e)}")
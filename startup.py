@@ -0,0 +1,19 @@
+import importlib
+import sys
+import time
+
+# Measured from the first import of this module, which main.py does before anything else
+START_TIME = time.perf_counter()
+import_times = {}
+
+def timed_import(name):
+    if name not in sys.modules:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        import_times[name] = time.perf_counter() - start
+    return sys.modules[name]
+
+def import_report(label="startup"):
+    lines = [f"{name:<24}{seconds * 1000:9.1f} ms" for name, seconds in sorted(import_times.items(), key=lambda item: -item[1])]
+    lines.append(f"{label:<24}{(time.perf_counter() - START_TIME) * 1000:9.1f} ms")
+    return "\n".join(lines)
@@ -0,0 +1,200 @@
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import wave
+import numpy as np
+from synthesis import SAMPLE_RATE, SAMPLE_WIDTH, to_pcm16
+from tracing import span
+
+# One second of audio per block keeps peak memory independent of the song length
+STREAM_BLOCK_SAMPLES = SAMPLE_RATE
+
+# Canonical PCM header: RIFF, a 16-byte fmt chunk and the data chunk header
+WAV_HEADER_BYTES = 44
+
+class WavWriter:
+    def __init__(self, path, sample_rate=SAMPLE_RATE, channels=1):
+        self.path = path
+        self.frames_written = 0
+        self._wav = wave.open(path, "wb")
+        self._wav.setnchannels(channels)
+        self._wav.setsampwidth(SAMPLE_WIDTH)
+        self._wav.setframerate(sample_rate)
+
+    def write(self, block):
+        self.write_pcm(to_pcm16(block).tobytes(), len(block))
+
+    def write_pcm(self, data, frame_count):
+        self._wav.writeframes(data)
+        self.frames_written += frame_count
+
+    def close(self):
+        # wave patches the RIFF and data chunk sizes on close
+        self._wav.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+# Compressed formats are encoded by an ffmpeg process fed raw PCM on stdin while rendering continues
+FFMPEG = "ffmpeg"
+ENCODER_FORMATS = {
+    ".flac": ("flac", ["-c:a", "flac"]),
+    ".ogg": ("ogg", ["-c:a", "libvorbis", "-q:a", "5"]),
+    ".mp3": ("mp3", ["-c:a", "libmp3lame", "-q:a", "2"]),
+}
+
+class EncoderWriter:
+    def __init__(self, path, sample_rate=SAMPLE_RATE, channels=1, extension=None):
+        container, codec_args = ENCODER_FORMATS[extension or os.path.splitext(path)[1].lower()]
+        if shutil.which(FFMPEG) is None:
+            raise RuntimeError(f"{FFMPEG} is needed to export {container} files")
+        self.path = path
+        self.frames_written = 0
+        # Errors go to a file, not a pipe, so a chatty encoder can't stall the render
+        self._errors = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(
+            [FFMPEG, "-hide_banner", "-loglevel", "error", "-y", "-f", "s16le", "-ar", str(sample_rate), "-ac", str(channels),
+             "-i", "pipe:0", *codec_args, "-f", container, path],
+            stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=self._errors)
+
+    def write(self, block):
+        self.write_pcm(to_pcm16(block).astype("<i2").tobytes(), len(block))
+
+    def write_pcm(self, data, frame_count):
+        try:
+            self._process.stdin.write(data)
+        except BrokenPipeError:
+            self._process.wait()
+            raise RuntimeError(f"Encoder stopped: {self._error_text()}") from None
+        self.frames_written += frame_count
+
+    def close(self):
+        if self._process.stdin.closed:
+            return
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        if self._process.wait() != 0:
+            raise RuntimeError(f"Encoder failed: {self._error_text()}")
+
+    def abort(self):
+        self._process.kill()
+        self._process.wait()
+
+    def _error_text(self):
+        self._errors.seek(0)
+        return self._errors.read().decode(errors="replace").strip() or f"exit code {self._process.returncode}"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        self._errors.close()
+
+def open_writer(path, sample_rate=SAMPLE_RATE, extension=None):
+    extension = extension or os.path.splitext(path)[1].lower()
+    if extension in ENCODER_FORMATS:
+        return EncoderWriter(path, sample_rate, extension=extension)
+    return WavWriter(path, sample_rate)
+
+def iter_blocks(sections, block_samples=STREAM_BLOCK_SAMPLES):
+    block = np.zeros(block_samples, dtype=np.float32)
+    filled = 0
+
+    # Carve the sections into fixed-size blocks, spanning section boundaries
+    for section in sections:
+        position = 0
+        while position < len(section):
+            count = min(block_samples - filled, len(section) - position)
+            block[filled:filled + count] = section[position:position + count]
+            filled += count
+            position += count
+            if filled == block_samples:
+                yield block
+                block = np.zeros(block_samples, dtype=np.float32)
+                filled = 0
+
+    if filled:
+        yield block[:filled]
+
+def write_wav(blocks, path, sample_rate=SAMPLE_RATE):
+    def write(writer):
+        for block in blocks:
+            with span("write", "block", samples=len(block)):
+                writer.write(block)
+
+    return _write_atomically(write, path, sample_rate)
+
+def write_wav_loop(samples, path, loops=1, sample_rate=SAMPLE_RATE):
+    # The loop is converted to PCM once; each repetition is only a file write
+    def write(writer):
+        pcm = to_pcm16(samples).tobytes()
+        for _ in range(loops):
+            with span("write", "block", samples=len(samples)):
+                writer.write_pcm(pcm, len(samples))
+
+    return _write_atomically(write, path, sample_rate)
+
+def wav_header(frame_count, sample_rate=SAMPLE_RATE, channels=1):
+    block_align = channels * SAMPLE_WIDTH
+    data_bytes = frame_count * block_align
+    return struct.pack("<4sI4s4sIHHIIHH4sI", b"RIFF", 36 + data_bytes, b"WAVE", b"fmt ", 16, 1, channels,
+                       sample_rate, sample_rate * block_align, block_align, SAMPLE_WIDTH * 8, b"data", data_bytes)
+
+def open_wav_memmap(path, frame_count, sample_rate=SAMPLE_RATE):
+    # Preallocate the whole file so the data chunk can be filled in place
+    with open(path, "wb") as f:
+        f.write(wav_header(frame_count, sample_rate))
+        f.truncate(WAV_HEADER_BYTES + frame_count * SAMPLE_WIDTH)
+    if not frame_count:
+        return np.zeros(0, dtype="<i2")
+    return np.memmap(path, dtype="<i2", mode="r+", offset=WAV_HEADER_BYTES, shape=(frame_count,))
+
+def write_wav_memmap(blocks, path, frame_count, repeats=1, sample_rate=SAMPLE_RATE):
+    # blocks cover one pass of frame_count samples; later repeats are copied inside the mapping
+    partial = path + ".part"
+    try:
+        _fill_memmap(blocks, partial, frame_count, repeats, sample_rate)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    os.replace(partial, path)
+    return frame_count * repeats
+
+def _fill_memmap(blocks, path, frame_count, repeats, sample_rate):
+    out = open_wav_memmap(path, frame_count * repeats, sample_rate)
+    position = 0
+    for block in blocks:
+        with span("write", "block", samples=len(block)):
+            to_pcm16(block, out[position:position + len(block)])
+        position += len(block)
+
+    for start in range(frame_count, len(out), max(frame_count, 1)):
+        with span("write", "block", samples=frame_count):
+            out[start:start + frame_count] = out[:frame_count]
+    if isinstance(out, np.memmap):
+        out.flush()
+
+def _write_atomically(write, path, sample_rate):
+    # Write next to the target so a cancelled or failed render leaves the previous file intact
+    partial = path + ".part"
+    try:
+        with open_writer(partial, sample_rate, os.path.splitext(path)[1].lower()) as writer:
+            write(writer)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    os.replace(partial, path)
+    return writer.frames_written
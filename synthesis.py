@@ -0,0 +1,60 @@
+import numpy as np
+from wavetable import oscillate
+
+SAMPLE_RATE = 44100
+SAMPLE_WIDTH = 2
+MAX_AMPLITUDE = 2 ** 15 - 1
+
+# Number of samples synthesized per pass; keeps the phase and index scratch buffers small for long sections
+BLOCK_SAMPLES = 65536
+
+def db_to_gain(volume_db):
+    return 10 ** (volume_db / 20.0)
+
+def samples_for(duration_ms, sample_rate=SAMPLE_RATE):
+    return int(sample_rate * (duration_ms / 1000.0))
+
+def partial_frequencies(base_freq, intervals):
+    return base_freq * (2.0 ** (np.asarray(intervals, dtype=np.float64) / 12.0))
+
+def render_partials(frequencies, sample_count, volume_db=-10, sample_rate=SAMPLE_RATE, start=0, waveform="sine"):
+    frequencies = np.atleast_1d(np.asarray(frequencies, dtype=np.float64))
+    out = np.zeros(max(sample_count, 0), dtype=np.float32)
+    if not len(out) or not len(frequencies):
+        return out
+
+    # Wavetable lookups for every partial at once, summed per block
+    gain = np.float32(db_to_gain(volume_db))
+    for offset in range(0, len(out), BLOCK_SAMPLES):
+        count = min(BLOCK_SAMPLES, len(out) - offset)
+        out[offset:offset + count] = oscillate(frequencies, start + offset, count, sample_rate, waveform).sum(axis=0) * gain
+    return out
+
+def render_chord(base_freq, intervals, duration_ms, volume_db=-10, sample_rate=SAMPLE_RATE, waveform="sine"):
+    return render_partials(partial_frequencies(base_freq, intervals), samples_for(duration_ms, sample_rate), volume_db, sample_rate, waveform=waveform)
+
+def render_arpeggio(base_freq, intervals, duration_ms, volume_db=-10, sample_rate=SAMPLE_RATE, waveform="sine"):
+    note_count = samples_for(duration_ms // len(intervals), sample_rate)
+    # Each note restarts its oscillator at phase 0, matching one Sine segment per note
+    notes = [render_partials(freq, note_count, volume_db, sample_rate, waveform=waveform) for freq in partial_frequencies(base_freq, intervals)]
+    return np.concatenate(notes) if notes else np.zeros(0, dtype=np.float32)
+
+def render_noise(sample_count, volume_db=-20, seed=0):
+    # Uniform white noise in [-1, 1) like pydub's WhiteNoise, drawn in one call and reproducible per seed
+    rng = np.random.default_rng(seed)
+    return (rng.random(max(sample_count, 0), dtype=np.float32) * 2 - 1) * np.float32(db_to_gain(volume_db))
+
+def to_pcm16(samples, out=None):
+    if out is None:
+        return (np.clip(samples, -1.0, 1.0) * MAX_AMPLITUDE).astype(np.int16)
+    # Converts straight into an existing int16 buffer, such as a memory-mapped file
+    return np.multiply(np.clip(samples, -1.0, 1.0), MAX_AMPLITUDE, out=out, casting="unsafe")
+
+def to_audio_segment(samples, sample_rate=SAMPLE_RATE):
+    from pydub import AudioSegment  # pydub is only needed at the AudioSegment boundary
+
+    return AudioSegment(data=to_pcm16(samples).tobytes(), sample_width=SAMPLE_WIDTH, frame_rate=sample_rate, channels=1)
+
+def from_audio_segment(audio_segment):
+    samples = np.array(audio_segment.get_array_of_samples(), dtype=np.float32)
+    return samples / MAX_AMPLITUDE
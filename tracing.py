@@ -0,0 +1,69 @@
+from contextlib import contextmanager
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+TRACE_PATH = "render_trace.json"
+
+_current = contextvars.ContextVar("tracer", default=None)
+
+class Tracer:
+    def __init__(self):
+        self.spans = []
+        self.start = time.perf_counter()
+
+    @contextmanager
+    def span(self, name, category="stage", **args):
+        record = {"name": name, "cat": category, "args": args, "tid": threading.get_ident()}
+        blocks = sys.getallocatedblocks()
+        traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        record["start"] = time.perf_counter()
+        try:
+            yield record["args"]
+        finally:
+            record["dur"] = time.perf_counter() - record["start"]
+            args["alloc_blocks"] = sys.getallocatedblocks() - blocks
+            if traced is not None:
+                args["traced_bytes"] = tracemalloc.get_traced_memory()[0] - traced
+            self.spans.append(record)
+
+    def totals(self):
+        totals = {}
+        for record in self.spans:
+            seconds, count = totals.get(record["name"], (0.0, 0))
+            totals[record["name"]] = (seconds + record["dur"], count + 1)
+        return totals
+
+    def summary(self, limit=5):
+        totals = sorted(self.totals().items(), key=lambda item: -item[1][0])[:limit]
+        return ", ".join(f"{name} {seconds:.2f}s" + (f" x{count}" if count > 1 else "") for name, (seconds, count) in totals)
+
+    def write_chrome_trace(self, path=TRACE_PATH):
+        # Complete ("X") events with microsecond timestamps, loadable in chrome://tracing and Perfetto
+        events = [{"name": record["name"], "cat": record["cat"], "ph": "X", "pid": os.getpid(), "tid": record["tid"],
+                   "ts": (record["start"] - self.start) * 1e6, "dur": record["dur"] * 1e6, "args": record["args"]}
+                  for record in self.spans]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+@contextmanager
+def trace():
+    tracer = Tracer()
+    token = _current.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current.reset(token)
+
+@contextmanager
+def _no_span():
+    yield {}
+
+def span(name, category="stage", **args):
+    # A no-op unless a trace() is active on this thread
+    tracer = _current.get()
+    return tracer.span(name, category, **args) if tracer is not None else _no_span()
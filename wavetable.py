@@ -0,0 +1,69 @@
+import numpy as np
+from chord_management import CHORD_FREQUENCIES
+from render_cache import wavetable_cache
+
+TABLE_BITS = 12
+TABLE_SIZE = 1 << TABLE_BITS
+
+# Oscillator phase is a 64-bit fixed-point fraction of a cycle: it wraps for free in uint64
+# and stays sample-accurate however far into a track the oscillator starts
+PHASE_BITS = 64
+
+WAVEFORMS = ("sine", "saw", "square", "triangle")
+
+NOTE_NAMES = tuple(CHORD_FREQUENCIES)
+# Every note in octaves 0-10, so any chord interval stacked on an octave 0-8 root is covered
+NOTE_FREQUENCIES = np.array([[CHORD_FREQUENCIES[name] * 2.0 ** (octave - 4) for name in NOTE_NAMES] for octave in range(11)])
+LOWEST_FREQUENCY = NOTE_FREQUENCIES[0, 0]
+
+def note_frequency(name, octave=4, semitones=0):
+    semitones = NOTE_NAMES.index(name) + np.asarray(semitones)
+    return NOTE_FREQUENCIES[octave + semitones // 12, semitones % 12]
+
+def harmonic_amplitudes(waveform, count):
+    k = np.arange(1, count + 1)
+    if waveform == "sine":
+        return (k == 1).astype(np.float64)
+    if waveform == "saw":
+        return 2 / np.pi * (-1.0) ** (k + 1) / k
+    if waveform == "square":
+        return np.where(k % 2 == 1, 4 / (np.pi * k), 0.0)
+    if waveform == "triangle":
+        return np.where(k % 2 == 1, 8 / np.pi ** 2 * (-1.0) ** ((k - 1) // 2) / k ** 2, 0.0)
+    raise ValueError(f"Unknown waveform {waveform!r}")
+
+def build_tables(waveform, sample_rate):
+    # One table per octave band, each holding only the harmonics that stay below Nyquist for the
+    # band's highest note. Slopes to the next entry are stored alongside for linear interpolation.
+    values = np.zeros((NOTE_FREQUENCIES.shape[0], TABLE_SIZE), dtype=np.float32)
+    for band in range(len(values)):
+        top = LOWEST_FREQUENCY * 2.0 ** (band + 1)
+        count = int(np.clip(sample_rate / 2 // top, 1, TABLE_SIZE // 2 - 1))
+        spectrum = np.zeros(TABLE_SIZE // 2 + 1, dtype=np.complex128)
+        spectrum[1:count + 1] = -0.5j * TABLE_SIZE * harmonic_amplitudes(waveform, count)
+        values[band] = np.fft.irfft(spectrum, n=TABLE_SIZE)
+    slopes = np.roll(values, -1, axis=1) - values
+    return np.stack([values, slopes])
+
+def get_tables(waveform, sample_rate):
+    return wavetable_cache.get_or_create((waveform, sample_rate), lambda: build_tables(waveform, sample_rate))
+
+def band_for(frequencies):
+    return np.clip(np.floor(np.log2(np.maximum(frequencies, LOWEST_FREQUENCY) / LOWEST_FREQUENCY)), 0, NOTE_FREQUENCIES.shape[0] - 1).astype(np.intp)
+
+def oscillate(frequencies, start, count, sample_rate, waveform="sine"):
+    # Returns one row per frequency for samples start..start+count, by interpolated table lookup
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    values, slopes = (table[band_for(frequencies)].ravel() for table in get_tables(waveform, sample_rate))
+    increments = np.array([int(round(f / sample_rate * 2.0 ** PHASE_BITS)) % 2 ** PHASE_BITS for f in frequencies], dtype=np.uint64)
+
+    phase = np.arange(start, start + count, dtype=np.uint64) * increments[:, np.newaxis]
+    # Top bits pick the table entry, the rest are the fraction towards the next one;
+    # each row's indices are offset into the flattened tables so lookups stay one-dimensional
+    index = (phase >> np.uint64(PHASE_BITS - TABLE_BITS)).view(np.int64)
+    index += np.arange(0, len(frequencies) * TABLE_SIZE, TABLE_SIZE)[:, np.newaxis]
+    out = (phase & np.uint64(2 ** (PHASE_BITS - TABLE_BITS) - 1)).view(np.int64).astype(np.float32)
+    out *= np.float32(2.0 ** (TABLE_BITS - PHASE_BITS))
+    out *= slopes.take(index)
+    out += values.take(index)
+    return out